@@ -0,0 +1,151 @@
+"""
+HTTP caching helpers: precompressed in-memory assets with ETags, and
+static file serving with Cache-Control and precompressed variants.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from ..core.config import HTTP_CACHE_CONFIG
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+@dataclass
+class CachedAsset:
+    """A response body kept in memory with its compressed variants.
+
+    Attributes:
+        body: Uncompressed body
+        media_type: Content-Type of the body
+        cache_control: Cache-Control header sent with every response
+        etag: Strong ETag of the uncompressed body
+        encodings: Compressed bodies by content coding ('br', 'gzip'), when smaller
+    """
+    body: bytes
+    media_type: str
+    cache_control: str
+    etag: str = ''
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each representation needs its own strong ETag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+def precompress(body: bytes, media_type: str, cache_control: str) -> CachedAsset:
+    """Hash a body and compress it with every available coding."""
+    asset = CachedAsset(body, media_type, cache_control, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+    if len(body) >= HTTP_CACHE_CONFIG['min_compress_bytes']:
+        candidates = {'gzip': gzip.compress(body, compresslevel=HTTP_CACHE_CONFIG['gzip_level'], mtime=0)}
+        if brotli is not None:
+            candidates['br'] = brotli.compress(body, quality=HTTP_CACHE_CONFIG['brotli_quality'])
+        asset.encodings = {coding: data for coding, data in candidates.items() if len(data) < len(body)}
+    return asset
+
+
+def file_version(path: str) -> str:
+    """Short content hash of a file, appended to asset URLs so each deploy gets new URLs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _accepted_encoding(request_headers: Headers, asset: CachedAsset) -> Optional[str]:
+    """Pick the smallest compressed variant the client accepts."""
+    accepted = set()
+    for item in request_headers.get('accept-encoding', '').split(','):
+        coding, _, params = item.partition(';')
+        name, _, value = params.strip().partition('=')
+        try:
+            quality = float(value) if name.strip() == 'q' else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    choices = [coding for coding in asset.encodings if coding in accepted or '*' in accepted]
+    return min(choices, key=lambda coding: len(asset.encodings[coding]), default=None)
+
+
+def etag_matches(request_headers: Headers, etags) -> bool:
+    """Whether If-None-Match names any of `etags` (or is "*")."""
+    if_none_match = request_headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or any(etag in tags for etag in etags)
+
+
+def asset_response(request_headers: Headers, asset: CachedAsset) -> Response:
+    """Serve a cached asset, answering revalidations with 304 Not Modified."""
+    encoding = _accepted_encoding(request_headers, asset)
+    headers = {'ETag': asset.etag_for(encoding), 'Cache-Control': asset.cache_control}
+    if asset.encodings:
+        headers['Vary'] = 'Accept-Encoding'
+
+    all_etags = [asset.etag] + [asset.etag_for(coding) for coding in asset.encodings]
+    if etag_matches(request_headers, all_etags):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+        return Response(asset.encodings[encoding], media_type=asset.media_type, headers=headers)
+    return Response(asset.body, media_type=asset.media_type, headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a Cache-Control header and precompressed text assets.
+
+    Compressible files up to ``max_precompress_bytes`` are read, hashed and
+    compressed on first request and kept in memory until their size or
+    modification time changes. Other files are streamed from disk as usual.
+    """
+
+    def __init__(self, *args, cache_control: str = HTTP_CACHE_CONFIG['static_cache_control'],
+                 max_precompress_bytes: int = HTTP_CACHE_CONFIG['static_max_precompress_kb'] << 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self.max_precompress_bytes = max_precompress_bytes
+        self._assets: Dict[str, Tuple[Tuple[float, int], CachedAsset]] = {}
+        self._lock = threading.Lock()
+
+    def _asset(self, full_path: str, stat_result: os.stat_result) -> Optional[CachedAsset]:
+        media_type = mimetypes.guess_type(full_path)[0] or ''
+        if stat_result.st_size > self.max_precompress_bytes or not media_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        version = (stat_result.st_mtime, stat_result.st_size)
+        with self._lock:
+            cached = self._assets.get(full_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(full_path, 'rb') as f:
+            asset = precompress(f.read(), media_type, self.cache_control)
+        with self._lock:
+            self._assets[full_path] = (version, asset)
+        return asset
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        if status_code == 200:
+            asset = self._asset(str(full_path), stat_result)
+            if asset is not None:
+                return asset_response(Headers(scope=scope), asset)
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers['Cache-Control'] = self.cache_control
+        return response
@@ -1,140 +1,294 @@
-from fastapi import APIRouter, UploadFile, File, Request, Form
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi import APIRouter, UploadFile, File, Request, Body
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+import asyncio
 import os
-import shutil
-from typing import Dict, Any
+from functools import lru_cache, partial
+import mimetypes
+from typing import Dict, Any, List, Optional
 import json
-from PIL import Image
-import librosa
-import soundfile as sf
-import trimesh
-import numpy as np
 
-from ..core.config import current_data, FILE_TYPES, BASE_DIR
-from ..services import TextProcessor, ImageProcessor, AudioProcessor, ThreeDProcessor
+from ..core.config import current_data, FILE_TYPES, JOB_CONFIG, EXPORT_CONFIG, SHARED_MEMORY_CONFIG, HTTP_CACHE_CONFIG
+from .caching import etag_matches
+from ..services.admission import Admission, AdmissionController, AdmissionTimeout
+from ..services.artifacts import ArtifactStore, META_FILENAME
+from ..services.blobs import BlobStore
+from ..services.export import ShardReader, export_uploads
+from ..services.jobs import JobManager, SUCCEEDED
+from ..services.multipart import multipart_chunks, new_boundary, result_parts
+from ..services.pipeline import process_upload, process_upload_data
+from ..services.workers import ProcessWorkers
 
 router = APIRouter()
 
-# Templates
-templates = Jinja2Templates(directory=str(BASE_DIR / "ui" / "templates"))
+# Background executor for processing jobs
+job_manager = JobManager()
 
-@router.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request}
-    )
+# Per-worker memory budget for processing jobs
+admission_controller = AdmissionController()
+
+# Uploads and processed outputs
+artifact_store = ArtifactStore()
+
+# Deduplicated upload contents, linked into upload artifacts
+blob_store = BlobStore()
+
+# Optional worker processes fed through shared memory
+process_workers = ProcessWorkers() if SHARED_MEMORY_CONFIG['worker_processes'] else None
+
+# Seconds between client disconnect checks while /preprocess waits for its job
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def detect_file_type(filename: str) -> Optional[str]:
+    for type_name, extensions in FILE_TYPES.items():
+        if any(filename.lower().endswith(ext) for ext in extensions):
+            return type_name
+    return None
+
+def register_upload(sha256: str, filename: str, file_type: str, deduplicated: bool) -> Dict[str, Any]:
+    """Record a stored blob as a new upload artifact and make it the current upload."""
+    filename = os.path.basename(filename)
+    artifact = artifact_store.create(kind='upload', file_type=file_type, filename=filename, sha256=sha256)
+    try:
+        blob_store.link(sha256, artifact.file(filename))
+    except BaseException:
+        artifact_store.discard(artifact)
+        raise
+    artifact_store.commit(artifact)
+
+    current_data["original"] = str(artifact.file(filename))
+    current_data["file_type"] = file_type
+    current_data["file_id"] = artifact.id
+
+    return {"status": "success", "file_type": file_type, "file_id": artifact.id, "sha256": sha256,
+            "deduplicated": deduplicated, "url": artifact_store.url(artifact, filename)}
 
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     try:
-        # Save the uploaded file
-        file_path = str(BASE_DIR / "data" / file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Copy to static directory for serving
-        static_path = str(BASE_DIR / "ui" / "static" / file.filename)
-        shutil.copy2(file_path, static_path)
-        
-        # Determine file type
-        file_type = None
-        for type_name, extensions in FILE_TYPES.items():
-            if any(file.filename.lower().endswith(ext) for ext in extensions):
-                file_type = type_name
-                break
-        
+        file_type = detect_file_type(file.filename)
         if not file_type:
             return JSONResponse(status_code=400, content={'status': 'error', 'error': 'Unsupported file type'})
         
-        current_data["original"] = file_path
-        current_data["file_type"] = file_type
-        
-        return {"status": "success", "file_type": file_type}
+        # Store the contents once per distinct hash
+        sha256, created = blob_store.put(file.file)
+        return register_upload(sha256, file.filename, file_type, deduplicated=not created)
     except Exception as e:
         return JSONResponse(status_code=500, content={'status': 'error', 'error': str(e)})
 
-@router.post("/preprocess")
-async def preprocess_data_route(preprocessing: Dict[str, bool], augmentation: Dict[str, bool]):
-    if not current_data.get("original") or not current_data.get("file_type"):
-        return JSONResponse(status_code=400, content={'status': 'error', 'error': 'No file uploaded'})
-    
-    try:
-        file_type = current_data["file_type"]
-        file_path = current_data["original"]
-        
-        result = {
-            "original": None,
-            "preprocessed": None,
-            "augmented": None
-        }
-
-        if file_type == 'text':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            processed_data = TextProcessor.process(text, preprocessing, augmentation)
-            result["original"] = processed_data["original"]
-            result["preprocessed"] = processed_data["preprocessed"]
-            result["augmented"] = processed_data["augmented"]
-            
-            # For text, return content directly
-            return {"status": "success", **result}
-            
-        elif file_type == 'image':
-            image = Image.open(file_path)
-            processed_data = ImageProcessor.process(image, preprocessing, augmentation)
-            
-            # Save processed images to static for serving
-            output_paths = {}
-            for stage in ['original', 'preprocessed', 'augmented']:
-                 # Ensure we have data for the stage
-                if processed_data[stage] is not None:
-                    # Create a unique filename for the processed image
-                    base_name = os.path.splitext(os.path.basename(file_path))[0]
-                    output_filename = f'{stage}_{base_name}.png' # Save as PNG
-                    output_path = str(BASE_DIR / "ui" / "static" / output_filename)
-                    processed_data[stage].save(output_path)
-                    output_paths[stage] = f'/static/{output_filename}'
-            
-            return {"status": "success", **output_paths}
-            
-        elif file_type == 'audio':
-            audio_data, sr = sf.read(file_path)
-            processed_data = AudioProcessor.process(audio_data, sr, preprocessing, augmentation)
-
-            # Save processed audio to static for serving
-            output_paths = {}
-            for stage in ['original', 'preprocessed', 'augmented']:
-                if processed_data[stage] is not None:
-                     base_name = os.path.splitext(os.path.basename(file_path))[0]
-                     output_filename = f'{stage}_{base_name}.wav' # Save as WAV
-                     output_path = str(BASE_DIR / "ui" / "static" / output_filename)
-                     sf.write(output_path, processed_data[stage][0], processed_data[stage][1])
-                     output_paths[stage] = f'/static/{output_filename}'
-
-            return {"status": "success", **output_paths}
-
-        elif file_type == '3d':
-            mesh = trimesh.load_mesh(file_path)
-            processed_data = ThreeDProcessor.process(mesh, preprocessing, augmentation)
-
-            # Save processed 3D models to static for serving (e.g., as OBJ)
-            output_paths = {}
-            for stage in ['original', 'preprocessed', 'augmented']:
-                 if processed_data[stage] is not None:
-                    base_name = os.path.splitext(os.path.basename(file_path))[0]
-                    output_filename = f'{stage}_{base_name}.obj' # Save as OBJ
-                    output_path = str(BASE_DIR / "ui" / "static" / output_filename)
-                    processed_data[stage].export(output_path)
-                    output_paths[stage] = f'/static/{output_filename}'
-            
-            return {"status": "success", **output_paths}
-
-        else:
-            return JSONResponse(status_code=400, content={'status': 'error', 'error': 'Unsupported file type for processing'})
+@router.api_route("/uploads/{sha256}", methods=["GET", "HEAD"])
+async def check_upload(sha256: str):
+    """Whether content with this SHA-256 is already stored, so its upload can be skipped."""
+    if blob_store.lookup(sha256) is None:
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Unknown content hash'})
+    return {"status": "success", "sha256": sha256.lower()}
+
+@router.post("/uploads/{sha256}")
+async def upload_by_hash(sha256: str, filename: str = Body(..., embed=True)):
+    """Upload already-stored content by its SHA-256 without transferring it again.
 
+    Returns the same result as /upload, or 404 if the content must be uploaded.
+    """
+    try:
+        file_type = detect_file_type(filename)
+        if not file_type:
+            return JSONResponse(status_code=400, content={'status': 'error', 'error': 'Unsupported file type'})
+        if blob_store.lookup(sha256) is None:
+            return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Unknown content hash'})
+        return register_upload(sha256.lower(), filename, file_type, deduplicated=True)
     except Exception as e:
-        print(f"Error during processing: {e}")
-        return JSONResponse(status_code=500, content={'status': 'error', 'error': str(e)}) 
\ No newline at end of file
+        return JSONResponse(status_code=500, content={'status': 'error', 'error': str(e)})
+
+def admission_error(admission: Admission, prefix: str = '') -> JSONResponse:
+    """Reject a request: 415 if its file is unreadable, 503 if the server is saturated with jobs,
+    413 if it does not fit the memory budget."""
+    status_code = 415 if admission.unreadable else 503 if admission.busy else 413
+    return JSONResponse(status_code=status_code,
+                        content={'status': 'error', 'error': prefix + admission.rejected,
+                                 'admission': admission.to_dict()})
+
+async def submit_processing(preprocessing: Dict[str, bool], augmentation: Dict[str, bool], file_id: Optional[str] = None,
+                      variants: int = 1, seed: Optional[int] = None, in_memory: bool = False):
+    """Admit an uploaded file against the memory budget and submit it as a job.
+
+    Processes the upload with the given ID, or the most recent upload if no
+    ID is given. With `in_memory` the job returns the processed data instead
+    of saving it. Returns the job, or an error response if there is no such
+    upload or the request cannot fit in the memory budget.
+    """
+    upload = artifact_store.get(file_id or current_data.get("file_id") or '')
+    if upload is None or upload.meta.get('kind') != 'upload':
+        error = 'Unknown file_id' if file_id else 'No file uploaded'
+        return JSONResponse(status_code=400, content={'status': 'error', 'error': error})
+
+    # Probing reads file headers (and scans whole OBJ files), so keep it off the event loop
+    admission = await asyncio.to_thread(admission_controller.evaluate, upload.meta['file_type'],
+                                        str(upload.file(upload.meta['filename'])), preprocessing, augmentation,
+                                        variants)
+    if admission.rejected:
+        return admission_error(admission)
+
+    if in_memory:
+        process = partial(process_upload_data, scale=admission.scale, variants=variants, seed=seed)
+    else:
+        process = partial(process_upload, scale=admission.scale, variants=variants, seed=seed,
+                          workers=process_workers)
+    if not admission_controller.admit(admission):
+        return admission_error(admission)
+    job = job_manager.submit(admission_controller.run, admission, process,
+                             upload, preprocessing, augmentation, artifact_store)
+    job.add_done_callback(admission_controller.release)
+    return job
+
+@router.post("/preprocess")
+async def preprocess_data_route(request: Request, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                                file_id: Optional[str] = Body(None),
+                                variants: int = Body(1, ge=1, le=JOB_CONFIG['max_variants']),
+                                seed: Optional[int] = Body(None, ge=0),
+                                response: str = Body('json', pattern='^(json|multipart)$'),
+                                stream: bool = Body(False)):
+    """Process an uploaded file and return the result.
+
+    With `response` "json" the outputs are saved and returned as URLs (text
+    inline). With "multipart" nothing is saved: the outputs are returned as
+    a multipart/mixed body of .npy arrays or gzipped text, sent part by part
+    when `stream` is set.
+    """
+    in_memory = response == 'multipart'
+    job = await submit_processing(preprocessing, augmentation, file_id, variants, seed, in_memory)
+    if isinstance(job, JSONResponse):
+        return job
+
+    # Run the work in the job executor and stop it if the client goes away
+    waiter = asyncio.ensure_future(job_manager.wait(job))
+    while not waiter.done():
+        if await request.is_disconnected():
+            job.cancel()
+            waiter.cancel()
+            return JSONResponse(status_code=499, content={'status': 'error', 'error': 'Client disconnected'})
+        await asyncio.wait({waiter}, timeout=DISCONNECT_POLL_INTERVAL)
+
+    if job.status == SUCCEEDED and in_memory:
+        boundary = new_boundary()
+        media_type = f'multipart/mixed; boundary={boundary}'
+        chunks = multipart_chunks(result_parts(job.take_result()), boundary)
+        if stream:
+            return StreamingResponse(chunks, media_type=media_type)
+        # Serializing every array (and gzipping text) is CPU-bound: keep it off the event loop
+        return Response(content=await asyncio.to_thread(b''.join, chunks), media_type=media_type)
+    if job.status == SUCCEEDED:
+        return job.result
+    if isinstance(job.exception, AdmissionTimeout):
+        return JSONResponse(status_code=503, content={'status': 'error', 'error': job.error})
+    print(f"Error during processing: {job.error}")
+    return JSONResponse(status_code=500, content={'status': 'error', 'error': job.error or job.status})
+
+@router.post("/jobs")
+async def submit_job(preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                     file_id: Optional[str] = Body(None),
+                     variants: int = Body(1, ge=1, le=JOB_CONFIG['max_variants']),
+                     seed: Optional[int] = Body(None, ge=0)):
+    """Start processing an uploaded file in the background and return its job ID."""
+    job = await submit_processing(preprocessing, augmentation, file_id, variants, seed)
+    if isinstance(job, JSONResponse):
+        return job
+    return JSONResponse(status_code=202, content={"status": "success", "job_id": job.id})
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status of a job and, once it succeeded, its result."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Job not found'})
+    return {"status": "success", "job": job.to_dict()}
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job progress and status changes as Server-Sent Events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Job not found'})
+
+    async def event_stream():
+        async for event in job.stream():
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job. Running work stops at its next step."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Job not found'})
+    if not job.cancel():
+        return JSONResponse(status_code=409, content={'status': 'error', 'error': f'Job already {job.status}'})
+    return {"status": "success", "job_id": job.id}
+
+@router.get("/artifacts/{artifact_id}/{filename}")
+async def get_artifact_file(request: Request, artifact_id: str, filename: str):
+    """Serve a file of an uploaded or processed artifact.
+
+    Artifact files never change once written, so clients may cache them
+    and revalidate with the ETag set by FileResponse.
+    """
+    artifact = artifact_store.get(artifact_id)
+    if artifact is None or filename == META_FILENAME or not artifact.file(filename).is_file():
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Artifact not found'})
+    path = artifact.file(filename)
+    response = FileResponse(path, stat_result=os.stat(path),
+                            headers={'Cache-Control': HTTP_CACHE_CONFIG['artifact_cache_control']})
+    if etag_matches(request.headers, [response.headers['etag']]):
+        return Response(status_code=304, headers={'ETag': response.headers['etag'],
+                                                  'Cache-Control': HTTP_CACHE_CONFIG['artifact_cache_control']})
+    return response
+
+@router.post("/export")
+async def export_batch(preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                       file_ids: List[str] = Body(..., min_length=1, max_length=EXPORT_CONFIG['max_batch_files']),
+                       variants: int = Body(1, ge=1, le=JOB_CONFIG['max_variants']),
+                       seed: Optional[int] = Body(None, ge=0), deduplicate: bool = Body(False)):
+    """Process a batch of uploads into tar shards in the background and return the job ID."""
+    uploads = [artifact_store.get(file_id) for file_id in file_ids]
+    for file_id, upload in zip(file_ids, uploads):
+        if upload is None or upload.meta.get('kind') != 'upload':
+            return JSONResponse(status_code=400, content={'status': 'error', 'error': f'Unknown file_id {file_id}'})
+
+    def evaluate_all():
+        return [admission_controller.evaluate(upload.meta['file_type'], str(upload.file(upload.meta['filename'])),
+                                              preprocessing, augmentation, variants)
+                for upload in uploads]
+
+    # Up to max_batch_files header probes: run them off the event loop
+    admissions = await asyncio.to_thread(evaluate_all)
+    for file_id, admission in zip(file_ids, admissions):
+        if admission.rejected:
+            return admission_error(admission, f'{file_id}: ')
+
+    # Sources are processed one at a time, so the batch needs the largest estimate
+    peak = max(admissions, key=lambda admission: admission.estimate)
+    if not admission_controller.admit(peak):
+        return admission_error(peak)
+    job = job_manager.submit(admission_controller.run, peak,
+                             partial(export_uploads, scales=[admission.scale for admission in admissions],
+                                     variants=variants, seed=seed, deduplicate=deduplicate),
+                             uploads, preprocessing, augmentation, artifact_store)
+    job.add_done_callback(admission_controller.release)
+    return JSONResponse(status_code=202, content={"status": "success", "job_id": job.id})
+
+@lru_cache(maxsize=EXPORT_CONFIG['reader_cache_size'])
+def open_export(artifact_id: str) -> ShardReader:
+    return ShardReader(artifact_store.get(artifact_id).path)
+
+@router.get("/exports/{artifact_id}/records/{key:path}")
+async def get_export_record(artifact_id: str, key: str):
+    """Serve one record of an export, located through the shard offset indexes."""
+    artifact = artifact_store.get(artifact_id)
+    if artifact is None or artifact.meta.get('kind') != 'export':
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Export not found'})
+    try:
+        data = open_export(artifact_id).read(key)
+    except (KeyError, OSError):
+        return JSONResponse(status_code=404, content={'status': 'error', 'error': 'Record not found'})
+    media_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+    return Response(content=data, media_type=media_type)
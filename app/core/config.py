@@ -35,10 +35,90 @@ THREE_D_CONFIG = {
     'scale_range': (0.8, 1.2)
 }
 
+# Background job configuration
+JOB_CONFIG = {
+    'max_workers': 2,
+    'max_finished_jobs': 100,
+    'max_variants': 64
+}
+
+# Memory admission control
+ADMISSION_CONFIG = {
+    'memory_budget_mb': 2048,
+    'max_waiting_jobs': 32,  # admitted jobs queued or running
+    'queue_timeout': 300,
+    'allow_downscale': True,
+    'min_downscale': 0.1
+}
+
+# Managed storage for uploads and processed outputs
+ARTIFACT_CONFIG = {
+    'root': BASE_DIR / "data" / "artifacts",
+    'url_prefix': '/artifacts',
+    'max_size_mb': 2048,
+    'max_age_hours': 24,
+    'sweep_interval': 60
+}
+
+# Content-addressed upload storage
+BLOB_CONFIG = {
+    'root': BASE_DIR / "data" / "blobs",
+    'grace_period': 3600,  # seconds an unreferenced blob is kept for "have hash?" checks
+    'sweep_interval': 300
+}
+
+# Sharded dataset export settings
+EXPORT_CONFIG = {
+    'shard_size_mb': 256,
+    'max_batch_files': 1000,
+    'reader_cache_size': 16
+}
+
+# MinHash/LSH near-duplicate detection for text exports
+NEAR_DUPLICATE_CONFIG = {
+    'shingle_size': 5,  # characters
+    'num_perm': 128,
+    'bands': 32,  # 4 rows per band: texts from about 0.4 Jaccard similarity become candidates
+    'threshold': 0.8
+}
+
+# Worker processes and the shared memory used to pass buffers to them.
+# With 'worker_processes' set to 0, processing runs in the job threads.
+SHARED_MEMORY_CONFIG = {
+    'worker_processes': 0,
+    'directory': '/dev/shm',
+    'pool_size_mb': 512,
+    'min_segment_kb': 64,
+    'max_mapped_mb': 512  # segment mappings cached per process
+}
+
+# Previews saved next to processed outputs for the web UI
+PREVIEW_CONFIG = {
+    'enabled': True,
+    'thumbnail_size': (160, 160),
+    'thumbnail_quality': 80,
+    'waveform_max_peaks': 4096,
+    'waveform_min_peaks': 64,
+    'lod_face_counts': [500, 2000, 8000]
+}
+
+# HTTP caching. The home page is always revalidated (cheaply, by ETag);
+# artifacts never change once written, so clients may keep them until they expire.
+HTTP_CACHE_CONFIG = {
+    'home_cache_control': 'no-cache',
+    'static_cache_control': 'public, max-age=3600',
+    'artifact_cache_control': 'public, max-age=86400, immutable',
+    'static_max_precompress_kb': 1024,
+    'min_compress_bytes': 512,
+    'gzip_level': 9,
+    'brotli_quality': 11
+}
+
 # Global state
 current_data = {
     "original": None,
     "preprocessed": None,
     "augmented": None,
-    "file_type": None
+    "file_type": None,
+    "file_id": None
 } 
\ No newline at end of file
@@ -3,22 +3,73 @@ Main FastAPI application module.
 This module sets up the FastAPI application and includes all routers.
 """
 
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
-from .api.routes import router
+from .api.caching import CachedStaticFiles, asset_response, file_version, precompress
+from .api.routes import router, job_manager, artifact_store, blob_store, process_workers
+from .core.config import HTTP_CACHE_CONFIG
 from .ui.templates import (
     generate_tab_nav,
     generate_content_section
 )
 
+STATIC_DIRECTORY = "app/ui/static"
+
+def asset_url(name: str, **path_params) -> str:
+    """Root-relative URL of a route; static files carry their content hash as ?v=."""
+    url = app.url_path_for(name, **path_params)
+    if name == 'static':
+        url += '?v=' + file_version(os.path.join(STATIC_DIRECTORY, path_params['path'].lstrip('/')))
+    return url
+
+def render_home_page() -> str:
+    """Render the home page with the data processing interface."""
+    # Generate tab navigation
+    tab_nav = generate_tab_nav()
+
+    # Generate content sections for each data type
+    text_content = generate_content_section('text', is_active=True)
+    image_content = generate_content_section('image')
+    audio_content = generate_content_section('audio')
+    three_d_content = generate_content_section('three-d')
+
+    # Render template with all components. Asset URLs are root-relative so
+    # the page does not depend on the host of the request, and versioned so
+    # browsers never run cached scripts from an earlier deploy.
+    return templates.get_template("index.html").render(
+        url_for=asset_url,
+        tab_nav=tab_nav,
+        text_content=text_content,
+        image_content=image_content,
+        audio_content=audio_content,
+        three_d_content=three_d_content
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Render the home page, start the storage sweepers and worker processes, and stop them and any jobs on shutdown."""
+    app.state.home_page = precompress(render_home_page().encode('utf-8'), 'text/html; charset=utf-8',
+                                      HTTP_CACHE_CONFIG['home_cache_control'])
+    artifact_store.start()
+    blob_store.start()
+    if process_workers is not None:
+        process_workers.start()
+    yield
+    job_manager.shutdown()
+    if process_workers is not None:
+        process_workers.shutdown()
+    artifact_store.stop()
+    blob_store.stop()
+
 # Create FastAPI app
-app = FastAPI(title="Data Processing Application")
+app = FastAPI(title="Data Processing Application", lifespan=lifespan)
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="app/ui/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIRECTORY), name="static")
 
 # Set up templates
 templates = Jinja2Templates(directory="app/ui/templates")
@@ -28,28 +79,8 @@ app.include_router(router)
 
 @app.get("/")
 async def home(request: Request):
-    """Render the home page with the data processing interface."""
-    # Generate tab navigation
-    tab_nav = generate_tab_nav()
-    
-    # Generate content sections for each data type
-    text_content = generate_content_section('text', is_active=True)
-    image_content = generate_content_section('image')
-    audio_content = generate_content_section('audio')
-    three_d_content = generate_content_section('three-d')
-    
-    # Render template with all components
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "tab_nav": tab_nav,
-            "text_content": text_content,
-            "image_content": image_content,
-            "audio_content": audio_content,
-            "three_d_content": three_d_content
-        }
-    )
+    """Serve the home page rendered at startup, revalidated by ETag."""
+    return asset_response(request.headers, request.app.state.home_page)
 
 if __name__ == "__main__":
     import uvicorn
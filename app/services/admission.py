@@ -0,0 +1,286 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from PIL import Image
+import soundfile as sf
+
+from ..core.config import ADMISSION_CONFIG, IMAGE_CONFIG, AUDIO_CONFIG
+
+# Working-set multipliers for each step, relative to the size of the data it
+# operates on. They model the temporaries the processors allocate (float64
+# copies, noise arrays, STFT matrices) and are deliberately conservative.
+IMAGE_FACTORS = {
+    'copies': 3,        # original, preprocessed and augmented PIL images
+    'normalize': 9,     # float64 array plus the uint8 result
+    'flip': 1,
+    'jitter': 13,       # float64 noise, int16 noise and sum, uint8 result
+}
+AUDIO_FACTORS = {
+    'decode': 1,        # float64 samples returned by soundfile
+    'resample': 3,
+    'noise': 2,
+    'stretch': 10,      # complex STFT and phase vocoder buffers
+    'pitch': 12,        # time stretch followed by a resample
+}
+MESH_BYTES_PER_VERTEX = 24 * 4   # float64 xyz plus trimesh caches
+MESH_BYTES_PER_FACE = 24 * 4     # int64 indices plus normals and adjacency
+MESH_COPIES = 3
+MESH_NOISE_FACTOR = 2
+TEXT_FACTOR = 40                 # Python strings and token lists per input byte
+MP3_DECODE_FACTOR = 44           # roughly 11:1 compression, decoded to float64
+SIZE_ESTIMATED_AUDIO = ('.mp3',)  # decoded by librosa's fallback when libsndfile cannot
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job cannot be run within the memory budget."""
+
+
+class AdmissionTimeout(AdmissionRejected):
+    """Raised inside a job that waited longer than the queue timeout for memory."""
+
+
+@dataclass
+class Admission:
+    """Outcome of evaluating a processing request against the memory budget.
+
+    Attributes:
+        file_type: Type of the file to process
+        file_path: Path of the file to process
+        header: Metadata read from the file header
+        estimate: Estimated peak working memory in bytes
+        scale: Factor applied to image dimensions when loading (1.0 = unchanged)
+        rejected: Reason the request was rejected, or None if admitted
+        unreadable: Whether it was rejected because the file could not be read
+        busy: Whether it was rejected because too many jobs are pending
+    """
+    file_type: str
+    file_path: str
+    header: Dict[str, Any] = field(default_factory=dict)
+    estimate: int = 0
+    scale: float = 1.0
+    rejected: Optional[str] = None
+    unreadable: bool = False
+    busy: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'header': self.header,
+            'estimated_memory_bytes': self.estimate,
+            'scale': self.scale,
+            'rejected': self.rejected,
+        }
+
+
+def probe(file_type: str, file_path: str) -> Dict[str, Any]:
+    """Read only the header of a file and return its dimensions.
+
+    Raises:
+        AdmissionRejected: If the header describes a file too large to open
+        OSError, ValueError: If the file is not a readable file of its type
+    """
+    size = os.path.getsize(file_path)
+
+    if file_type == 'image':
+        try:
+            with Image.open(file_path) as image:
+                return {'width': image.width, 'height': image.height, 'mode': image.mode,
+                        'bands': len(image.getbands()), 'bytes': size}
+        except Image.DecompressionBombError as e:
+            raise AdmissionRejected(str(e))
+
+    if file_type == 'audio':
+        try:
+            info = sf.info(file_path)
+            return {'frames': info.frames, 'channels': info.channels,
+                    'samplerate': info.samplerate, 'bytes': size}
+        except RuntimeError as e:
+            if not file_path.lower().endswith(SIZE_ESTIMATED_AUDIO):
+                raise ValueError(str(e)) from e
+            # Compressed formats older libsndfile cannot inspect: estimate from the file size
+            return {'frames': size * MP3_DECODE_FACTOR // 16, 'channels': 2,
+                    'samplerate': 44100, 'bytes': size, 'approximate': True}
+
+    if file_type == '3d':
+        return {**count_mesh_elements(file_path), 'bytes': size}
+
+    return {'bytes': size}
+
+
+def count_mesh_elements(file_path: str) -> Dict[str, int]:
+    """Count vertices and faces of an OBJ or OFF file without loading it."""
+    if file_path.lower().endswith('.off'):
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            header = f.readline().strip()
+            counts = header[3:].split() if header.upper().startswith('OFF') and len(header) > 3 else []
+            while not counts:
+                line = f.readline()
+                if not line:
+                    break
+                line = line.split('#')[0].strip()
+                counts = line.split()
+        if len(counts) >= 2:
+            return {'vertices': int(counts[0]), 'faces': int(counts[1])}
+        return {'vertices': 0, 'faces': 0}
+
+    # OBJ: count 'v ' and 'f ' records in large chunks
+    vertices = faces = 0
+    previous = b'\n'
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 22)
+            if not chunk:
+                break
+            data = previous + chunk
+            vertices += data.count(b'\nv ')
+            faces += data.count(b'\nf ')
+            # Carry two bytes over so records split across chunks are counted once
+            previous = data[-2:]
+    return {'vertices': vertices, 'faces': faces}
+
+
+def estimate_memory(file_type: str, header: Dict[str, Any], preprocessing: Dict[str, bool],
+                    augmentation: Dict[str, bool], scale: float = 1.0, variants: int = 1) -> int:
+    """Estimate the peak working memory of a processing request in bytes.
+
+    Augmentations are batched over the variants, so their temporaries and
+    outputs grow linearly with ``variants``.
+    """
+    if file_type == 'image':
+        pixels = int(header['width'] * scale) * int(header['height'] * scale)
+        base = pixels * header['bands']
+        processed = base
+        if preprocessing.get('resize'):
+            width, height = IMAGE_CONFIG['resize_size']
+            processed = width * height * header['bands']
+        steps = [IMAGE_FACTORS['normalize'] * processed if preprocessing.get('normalize') else 0,
+                 IMAGE_FACTORS['flip'] * processed if augmentation.get('flip') else 0,
+                 IMAGE_FACTORS['jitter'] * processed * variants if augmentation.get('jitter') else 0]
+        copies = IMAGE_FACTORS['copies'] - 1 + (variants - 1)
+        peak = base + copies * processed + max(steps)
+        if scale < 1.0:
+            # Formats without draft mode decode at full size before shrinking
+            full = header['width'] * header['height'] * header['bands']
+            peak = max(peak, full + base)
+        return peak
+
+    if file_type == 'audio':
+        base = header['frames'] * header['channels'] * 8
+        steps = [AUDIO_FACTORS['noise'] * base * variants] if augmentation.get('noise') else []
+        # Stretch and pitch run one variant at a time but keep every output
+        steps += [(AUDIO_FACTORS[name] + variants - 1) * base for name in ('stretch', 'pitch')
+                  if augmentation.get(name)]
+        if preprocessing.get('resample'):
+            ratio = max(1.0, AUDIO_CONFIG['target_sr'] / header['samplerate'])
+            steps.append(AUDIO_FACTORS['resample'] * ratio * base)
+        return int(AUDIO_FACTORS['decode'] * base + max(steps, default=0))
+
+    if file_type == '3d':
+        base = header['vertices'] * MESH_BYTES_PER_VERTEX + header['faces'] * MESH_BYTES_PER_FACE
+        noise = MESH_NOISE_FACTOR * header['vertices'] * 24 * variants if augmentation.get('noise') else 0
+        return (MESH_COPIES + variants - 1) * base + noise
+
+    return header['bytes'] * TEXT_FACTOR * (1 + variants) // 2
+
+
+class AdmissionController:
+    """Admits processing requests against a per-worker memory budget.
+
+    Requests whose estimate never fits are downscaled (images only) or
+    rejected. Requests that fit wait in `reserve` until enough of the budget
+    is free, so concurrent jobs never exceed it together. At most
+    ``max_pending`` admitted jobs may be queued or running at once; they
+    are counted from `admit` until `release`.
+    """
+
+    def __init__(self, budget_bytes: int = ADMISSION_CONFIG['memory_budget_mb'] << 20,
+                 max_pending: int = ADMISSION_CONFIG['max_waiting_jobs'],
+                 queue_timeout: float = ADMISSION_CONFIG['queue_timeout'],
+                 allow_downscale: bool = ADMISSION_CONFIG['allow_downscale'],
+                 min_scale: float = ADMISSION_CONFIG['min_downscale']):
+        self.budget = budget_bytes
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.allow_downscale = allow_downscale
+        self.min_scale = min_scale
+        self.in_use = 0
+        self.pending = 0
+        self._condition = threading.Condition()
+
+    def evaluate(self, file_type: str, file_path: str, preprocessing: Dict[str, bool],
+                 augmentation: Dict[str, bool], variants: int = 1) -> Admission:
+        """Decide whether a request is admitted, downscaled or rejected."""
+        admission = Admission(file_type, file_path)
+        try:
+            admission.header = probe(file_type, file_path)
+        except AdmissionRejected as e:
+            admission.rejected = str(e)
+            return admission
+        except (OSError, ValueError) as e:
+            admission.rejected = f'Cannot read {file_type} file: {e}'
+            admission.unreadable = True
+            return admission
+
+        admission.estimate = estimate_memory(file_type, admission.header, preprocessing, augmentation,
+                                             variants=variants)
+
+        if admission.estimate > self.budget and file_type == 'image' and self.allow_downscale:
+            # Memory grows with the pixel count, so shrink both sides by the square root
+            scale = math.sqrt(self.budget / admission.estimate)
+            while scale >= self.min_scale:
+                estimate = estimate_memory(file_type, admission.header, preprocessing, augmentation,
+                                           scale, variants)
+                if estimate <= self.budget:
+                    admission.scale, admission.estimate = scale, estimate
+                    break
+                scale *= 0.9
+
+        if admission.estimate > self.budget:
+            admission.rejected = (f'Estimated memory {admission.estimate >> 20} MiB exceeds '
+                                  f'the {self.budget >> 20} MiB budget')
+        return admission
+
+    def admit(self, admission: Admission) -> bool:
+        """Count an evaluated request as pending until `release`, unless too many already are."""
+        with self._condition:
+            if self.pending >= self.max_pending:
+                admission.rejected = 'Too many jobs waiting for memory'
+                admission.busy = True
+                return False
+            self.pending += 1
+            return True
+
+    def release(self, *_) -> None:
+        """Stop counting an admitted request. Usable as a job done callback."""
+        with self._condition:
+            self.pending -= 1
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """Hold ``nbytes`` of the budget, waiting until they are available."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            while self.in_use + nbytes > self.budget:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionTimeout('Timed out waiting for memory')
+                self._condition.wait(remaining)
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_use -= nbytes
+                self._condition.notify_all()
+
+    def run(self, admission: Admission, fn: Callable[..., Any], *args,
+            progress: Optional[Callable[[str], None]] = None) -> Any:
+        """Run ``fn(*args, progress=progress)`` once the admission's memory is reserved."""
+        if progress:
+            progress("admission")
+        with self.reserve(admission.estimate):
+            return fn(*args, progress=progress)
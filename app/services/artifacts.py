@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..core.config import ARTIFACT_CONFIG
+
+META_FILENAME = 'meta.json'
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+@dataclass
+class Artifact:
+    """A directory of files produced by one upload or processing call.
+
+    Attributes:
+        id: Unique artifact ID
+        path: Directory holding the artifact's files
+        meta: Free-form metadata stored alongside the files
+        size: Total size of the files in bytes
+        created: Creation time (seconds since the epoch)
+        last_access: Last time the artifact was read or written
+    """
+    id: str
+    path: Path
+    meta: Dict[str, Any] = field(default_factory=dict)
+    size: int = 0
+    created: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+    def file(self, filename: str) -> Path:
+        return self.path / os.path.basename(filename)
+
+
+class ArtifactStore:
+    """Stores artifacts in sharded directories with size and age quotas.
+
+    Artifacts live under ``root/ab/cd/<id>/`` where ``abcd`` are the first
+    characters of the ID, so no directory grows without bound. Artifacts
+    older than ``max_age`` seconds are deleted and, while the store is over
+    ``max_bytes``, the least recently used artifacts are evicted. Quotas are
+    enforced when an artifact is committed and by a background sweeper.
+    """
+
+    def __init__(self, root: Path = ARTIFACT_CONFIG['root'],
+                 url_prefix: str = ARTIFACT_CONFIG['url_prefix'],
+                 max_bytes: int = ARTIFACT_CONFIG['max_size_mb'] << 20,
+                 max_age: float = ARTIFACT_CONFIG['max_age_hours'] * 3600,
+                 sweep_interval: float = ARTIFACT_CONFIG['sweep_interval']):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.total_size = 0
+        self._index: 'OrderedDict[str, Artifact]' = OrderedDict()
+        self._pins: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _directory(self, artifact_id: str) -> Path:
+        return self.root / artifact_id[:2] / artifact_id[2:4] / artifact_id
+
+    def _load_index(self) -> None:
+        """Rebuild the index from the artifacts already on disk."""
+        artifacts = []
+        for meta_path in self.root.glob(f'*/*/*/{META_FILENAME}'):
+            directory = meta_path.parent
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            files = [p for p in directory.iterdir() if p.is_file()]
+            mtime = max(p.stat().st_mtime for p in files)
+            artifacts.append(Artifact(directory.name, directory, meta,
+                                      size=sum(p.stat().st_size for p in files),
+                                      created=meta.get('created', mtime), last_access=mtime))
+        for artifact in sorted(artifacts, key=lambda a: a.last_access):
+            self._index[artifact.id] = artifact
+            self.total_size += artifact.size
+
+    def create(self, **meta) -> Artifact:
+        """Create an empty artifact. Write its files, then call `commit`."""
+        artifact_id = uuid.uuid4().hex
+        artifact = Artifact(artifact_id, self._directory(artifact_id), {**meta, 'created': time.time()})
+        artifact.path.mkdir(parents=True)
+        return artifact
+
+    def commit(self, artifact: Artifact) -> Artifact:
+        """Record the artifact's files in the index and enforce the quotas."""
+        with open(artifact.path / META_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(artifact.meta, f)
+        artifact.size = sum(p.stat().st_size for p in artifact.path.iterdir() if p.is_file())
+        artifact.last_access = time.time()
+        with self._lock:
+            self._index[artifact.id] = artifact
+            self.total_size += artifact.size
+        self.sweep(keep=artifact.id)
+        return artifact
+
+    def discard(self, artifact: Artifact) -> None:
+        """Remove an artifact that was created but never committed."""
+        shutil.rmtree(artifact.path, ignore_errors=True)
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """Return an artifact and mark it as recently used."""
+        if not _ID_PATTERN.match(artifact_id):
+            return None
+        with self._lock:
+            artifact = self._index.get(artifact_id)
+            if artifact is not None:
+                artifact.last_access = time.time()
+                self._index.move_to_end(artifact_id)
+            return artifact
+
+    @contextmanager
+    def pinned(self, artifact_id: str) -> Iterator[None]:
+        """Protect an artifact from eviction while it is being read."""
+        with self._lock:
+            self._pins[artifact_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[artifact_id] -= 1
+                if not self._pins[artifact_id]:
+                    del self._pins[artifact_id]
+
+    def url(self, artifact: Artifact, filename: str) -> str:
+        return f'{self.url_prefix}/{artifact.id}/{os.path.basename(filename)}'
+
+    def delete(self, artifact_id: str) -> bool:
+        with self._lock:
+            artifact = self._index.pop(artifact_id, None)
+            if artifact is None:
+                return False
+            self.total_size -= artifact.size
+        shutil.rmtree(artifact.path, ignore_errors=True)
+        return True
+
+    def sweep(self, keep: Optional[str] = None) -> List[str]:
+        """Delete expired artifacts, then evict LRU artifacts until under quota.
+
+        Args:
+            keep: ID of an artifact that must not be evicted (e.g. the one just written)
+
+        Returns:
+            IDs of the deleted artifacts
+        """
+        now = time.time()
+        victims = []
+        with self._lock:
+            size = self.total_size
+            for artifact_id, artifact in self._index.items():
+                if artifact_id == keep or artifact_id in self._pins:
+                    continue
+                if now - artifact.created > self.max_age or size > self.max_bytes:
+                    victims.append(artifact_id)
+                    size -= artifact.size
+        for artifact_id in victims:
+            self.delete(artifact_id)
+        return victims
+
+    def start(self) -> None:
+        """Start the background sweeper thread."""
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='artifact-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping artifacts: {e}")
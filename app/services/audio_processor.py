@@ -1,36 +1,87 @@
 import numpy as np
 import librosa
 import soundfile as sf
-import random
-from typing import Dict, Any, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from ..core.config import AUDIO_CONFIG
+from .seeding import Seed, spawn_generators
 
 class AudioProcessor:
     @staticmethod
-    def process(audio_data: np.ndarray, sr: int, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool]) -> Dict[str, Tuple[np.ndarray, int]]:
-        result = {
+    def process(audio_data: np.ndarray, sr: int, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool],
+                progress: Optional[Callable[[str], None]] = None, variants: int = 1,
+                seed: Seed = None, out: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        preprocessed = AudioProcessor.preprocess(audio_data, sr, preprocessing_options, progress=progress)
+        augmented = AudioProcessor.augment(audio_data, sr, augmentation_options, variants, progress=progress,
+                                           seed=seed, out=out)
+        if augmented is None:
+            augmented = [(audio_data, sr)] * variants
+
+        return {
             "original": (audio_data, sr),
-            "preprocessed": (audio_data, sr),
-            "augmented": (audio_data, sr)
+            "preprocessed": preprocessed,
+            "augmented": augmented[0],
+            "variants": augmented
         }
-        
-        # Preprocessing
+
+    @staticmethod
+    def preprocess(audio_data: np.ndarray, sr: int, preprocessing_options: Dict[str, bool],
+                   progress: Optional[Callable[[str], None]] = None) -> Tuple[np.ndarray, int]:
         if preprocessing_options.get("resample"):
-            result["preprocessed"] = (librosa.resample(audio_data, orig_sr=sr, target_sr=AUDIO_CONFIG['target_sr']), 
-                                    AUDIO_CONFIG['target_sr'])
-        
-        # Augmentation
+            if progress:
+                progress("resample")
+            return (librosa.resample(audio_data, orig_sr=sr, target_sr=AUDIO_CONFIG['target_sr']),
+                    AUDIO_CONFIG['target_sr'])
+
+        return (audio_data, sr)
+
+    @staticmethod
+    def augment(audio_data: np.ndarray, sr: int, augmentation_options: Dict[str, bool], variants: int = 1,
+                progress: Optional[Callable[[str], None]] = None,
+                seed: Seed = None, out: Optional[np.ndarray] = None) -> Optional[List[Tuple[np.ndarray, int]]]:
+        """Produce `variants` augmented copies of a signal, or None if no augmentation is enabled.
+
+        Each copy draws from its own random stream derived from `seed`. Noisy
+        signals are written into `out` when given (see `batch_shape`).
+        """
+        rngs = spawn_generators(seed, variants)
+        augmented = None
+
         if augmentation_options.get("noise"):
-            noise = np.random.normal(0, AUDIO_CONFIG['noise_level'], audio_data.shape)
-            result["augmented"] = (audio_data + noise, sr)
-        
+            if progress:
+                progress("noise")
+            # One noise tensor of shape (variants, *audio_data.shape) for all copies,
+            # turned into the noisy signals in place
+            batch = out if out is not None else np.empty((variants,) + audio_data.shape)
+            for rng, variant_noise in zip(rngs, batch):
+                rng.standard_normal(out=variant_noise)
+            batch *= AUDIO_CONFIG['noise_level']
+            batch += audio_data
+            augmented = [(signal, sr) for signal in batch]
+
         if augmentation_options.get("stretch"):
-            rate = random.uniform(*AUDIO_CONFIG['stretch_range'])
-            result["augmented"] = (librosa.effects.time_stretch(audio_data, rate=rate), sr)
-        
+            augmented = []
+            for rng in rngs:
+                if progress:
+                    progress("stretch")
+                rate = rng.uniform(*AUDIO_CONFIG['stretch_range'])
+                augmented.append((librosa.effects.time_stretch(audio_data, rate=rate), sr))
+
         if augmentation_options.get("pitch"):
-            n_steps = random.randint(*AUDIO_CONFIG['pitch_range'])
-            result["augmented"] = (librosa.effects.pitch_shift(audio_data, sr=sr, n_steps=n_steps), sr)
-        
-        return result 
\ No newline at end of file
+            augmented = []
+            for rng in rngs:
+                if progress:
+                    progress("pitch")
+                n_steps = int(rng.integers(*AUDIO_CONFIG['pitch_range'], endpoint=True))
+                augmented.append((librosa.effects.pitch_shift(audio_data, sr=sr, n_steps=n_steps), sr))
+
+        return augmented
+
+    @staticmethod
+    def batch_shape(audio_data: np.ndarray, sr: int, preprocessing_options: Dict[str, bool],
+                    augmentation_options: Dict[str, bool],
+                    variants: int = 1) -> Optional[Tuple[Tuple[int, ...], np.dtype]]:
+        """Shape and dtype of the `out` buffer `augment` fills, or None if it uses none."""
+        if not augmentation_options.get("noise"):
+            return None
+        return (variants,) + audio_data.shape, np.dtype(np.float64)
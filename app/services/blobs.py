@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+from ..core.config import BLOB_CONFIG
+
+_DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobStore:
+    """Content-addressed, deduplicated file storage keyed by SHA-256.
+
+    Each distinct content is stored once, read-only, as ``root/ab/cd/<sha256>``.
+    Artifacts reference a blob through a hard link under their own filename,
+    so the link count of the file is the blob's reference count. A blob
+    whose only link is its entry in the store is unreferenced; `sweep`
+    deletes it once it has not been written or looked up for
+    ``grace_period`` seconds.
+    """
+
+    def __init__(self, root: Path = BLOB_CONFIG['root'], grace_period: float = BLOB_CONFIG['grace_period'],
+                 sweep_interval: float = BLOB_CONFIG['sweep_interval']):
+        self.root = Path(root)
+        self.grace_period = grace_period
+        self.sweep_interval = sweep_interval
+        self._incoming = self.root / 'incoming'
+        self._incoming.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def lookup(self, digest: str) -> Optional[Path]:
+        """Return the path of a stored blob, or None, and restart its grace period."""
+        digest = digest.lower()
+        if not _DIGEST_PATTERN.match(digest):
+            return None
+        path = self.path(digest)
+        with self._lock:
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+        return path
+
+    def put(self, source: BinaryIO, chunk_size: int = 1 << 20) -> Tuple[str, bool]:
+        """Store the contents of a file object, hashing them while they are copied.
+
+        Returns:
+            The SHA-256 of the contents and whether they were new to the store
+        """
+        digest = hashlib.sha256()
+        fd, incoming = tempfile.mkstemp(dir=self._incoming)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+            key = digest.hexdigest()
+            path = self.path(key)
+            with self._lock:
+                created = not path.exists()
+                if created:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    os.chmod(incoming, 0o444)
+                    os.replace(incoming, path)
+                else:
+                    os.utime(path)
+        finally:
+            if os.path.exists(incoming):
+                os.remove(incoming)
+        return key, created
+
+    def link(self, digest: str, destination: Path) -> None:
+        """Reference a blob as `destination`, copying it where hard links are unsupported."""
+        with self._lock:
+            try:
+                os.link(self.path(digest), destination)
+            except OSError:
+                shutil.copyfile(self.path(digest), destination)
+
+    def sweep(self) -> List[str]:
+        """Delete unreferenced blobs whose grace period has passed and return their hashes."""
+        now = time.time()
+        removed = []
+        for path in self.root.glob('*/*/*'):
+            if not _DIGEST_PATTERN.match(path.name):
+                continue
+            with self._lock:
+                try:
+                    stat = path.stat()
+                    if stat.st_nlink > 1 or now - stat.st_mtime < self.grace_period:
+                        continue
+                    path.unlink()
+                except OSError:
+                    continue
+            removed.append(path.name)
+        return removed
+
+    def start(self) -> None:
+        """Start the background sweeper thread."""
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='blob-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping blobs: {e}")
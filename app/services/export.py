@@ -0,0 +1,223 @@
+import hashlib
+import io
+import json
+import tarfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import EXPORT_CONFIG
+from .artifacts import Artifact, ArtifactStore
+from .jobs import JobCancelled
+from .near_duplicates import find_near_duplicates
+from .pipeline import EXTENSIONS, STAGES, encode, load, run_processors
+from .seeding import new_seed, spawn_seeds
+
+MANIFEST_FILENAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ShardWriter:
+    """Appends records to size-bounded tar shards in a directory.
+
+    Shards are named ``shard-00000.tar``, ``shard-00001.tar``, ... and each
+    gets a sidecar ``shard-00000.index.json`` mapping every record key to the
+    ``[offset, size]`` of its bytes inside the tar, so a record can be read
+    with one seek without scanning the archive. A new shard is started once
+    the current one reaches ``max_shard_bytes``.
+    """
+
+    def __init__(self, directory: Path, max_shard_bytes: int = EXPORT_CONFIG['shard_size_mb'] << 20):
+        self.directory = Path(directory)
+        self.max_shard_bytes = max_shard_bytes
+        self.shards: List[Dict[str, Any]] = []
+        self._file = None
+        self._tar: Optional[tarfile.TarFile] = None
+        self._index: Dict[str, Tuple[int, int]] = {}
+
+    def _open_shard(self) -> None:
+        name = f'shard-{len(self.shards):05d}'
+        self.shards.append({'tar': f'{name}.tar', 'index': f'{name}.index.json', 'records': 0, 'bytes': 0})
+        self._file = open(self.directory / f'{name}.tar', 'wb')
+        self._tar = tarfile.open(fileobj=self._file, mode='w', format=tarfile.PAX_FORMAT)
+        self._index = {}
+
+    def _close_shard(self) -> None:
+        if self._tar is None:
+            return
+        self._tar.close()
+        self._file.close()
+        shard = self.shards[-1]
+        shard['records'] = len(self._index)
+        shard['bytes'] = (self.directory / shard['tar']).stat().st_size
+        with open(self.directory / shard['index'], 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        self._tar = self._file = None
+
+    def add(self, key: str, data: bytes) -> None:
+        if self._tar is None or self._tar.offset >= self.max_shard_bytes:
+            self._close_shard()
+            self._open_shard()
+
+        info = tarfile.TarInfo(key)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+        # addfile leaves the offset after the data padded to whole blocks
+        blocks = -(-len(data) // tarfile.BLOCKSIZE)
+        self._index[key] = (self._tar.offset - blocks * tarfile.BLOCKSIZE, len(data))
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish the last shard and return the description of every shard."""
+        self._close_shard()
+        return self.shards
+
+
+class ShardReader:
+    """Random access to the records of an export by key."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILENAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._locations: Dict[str, Tuple[str, int, int]] = {}
+        for shard in self.manifest['shards']:
+            with open(self.directory / shard['index'], 'r', encoding='utf-8') as f:
+                for key, (offset, size) in json.load(f).items():
+                    self._locations[key] = (shard['tar'], offset, size)
+
+    def keys(self) -> List[str]:
+        return list(self._locations)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._locations
+
+    def read(self, key: str) -> bytes:
+        """Return the bytes of a record. Raises KeyError for unknown keys."""
+        tar_name, offset, size = self._locations[key]
+        with open(self.directory / tar_name, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+
+def _read_text(upload: Artifact, store: ArtifactStore) -> Optional[str]:
+    """The contents of a text upload, or None for other types and unreadable files."""
+    if upload.meta['file_type'] != 'text':
+        return None
+    try:
+        with store.pinned(upload.id):
+            return load('text', str(upload.file(upload.meta['filename'])))
+    except (OSError, ValueError):
+        return None
+
+
+def export_uploads(uploads: List[Artifact], preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                   store: ArtifactStore, progress: Optional[Callable[[str], None]] = None,
+                   scales: Optional[List[float]] = None, variants: int = 1,
+                   seed: Optional[int] = None, deduplicate: bool = False) -> Dict[str, Any]:
+    """Process a batch of uploads into a sharded export artifact.
+
+    Every stage and variant of every upload becomes one record keyed
+    ``<source index>/<stage>.<ext>`` (variants: ``augmented_<i>.<ext>``).
+    The manifest records the options, the batch seed and, per source, its
+    SHA-256, keys and any processing error. Source i is augmented with the
+    i-th child of the batch seed, so an export can be reproduced exactly.
+
+    With `deduplicate`, near-duplicate text sources are found first and only
+    the first of each cluster is processed; the others get no records of
+    their own and list its keys, with ``duplicate_of`` and ``similarity``.
+
+    Returns:
+        Dictionary with the status, the export artifact ID and the URLs of its files
+    """
+    if seed is None:
+        seed = new_seed()
+    scales = scales or [1.0] * len(uploads)
+
+    duplicates = {}
+    if deduplicate:
+        if progress:
+            progress("deduplicate")
+        duplicates = find_near_duplicates([_read_text(upload, store) for upload in uploads])
+
+    artifact = store.create(kind='export', format='tar', sources=len(uploads))
+    writer = ShardWriter(artifact.path)
+    sources = []
+    try:
+        for index, (upload, source_seed, scale) in enumerate(zip(uploads, spawn_seeds(seed, len(uploads)), scales)):
+            file_type = upload.meta['file_type']
+            file_path = str(upload.file(upload.meta['filename']))
+            source = {'file_id': upload.id, 'filename': upload.meta['filename'], 'file_type': file_type,
+                      'sha256': upload.meta.get('sha256') or file_sha256(file_path), 'keys': []}
+            if scale < 1.0:
+                source['scale'] = scale
+            sources.append(source)
+
+            if index in duplicates:
+                representative, similarity = duplicates[index]
+                if 'error' not in sources[representative]:
+                    source.update(duplicate_of=representative, similarity=similarity,
+                                  keys=sources[representative]['keys'])
+                    continue
+
+            try:
+                with store.pinned(upload.id):
+                    processed_data = run_processors(file_type, file_path, preprocessing, augmentation,
+                                                    progress=progress, scale=scale, variants=variants,
+                                                    seed=source_seed)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                source['error'] = str(e)
+                continue
+
+            if progress:
+                progress("export")
+            extension = EXTENSIONS[file_type]
+            records = [(stage, processed_data[stage]) for stage in STAGES]
+            records += [(f'augmented_{i}', variant) for i, variant in enumerate(processed_data['variants'][1:], 1)]
+            for name, data in records:
+                if data is None:
+                    continue
+                key = f'{index:06d}/{name}.{extension}'
+                writer.add(key, encode(file_type, data))
+                source['keys'].append(key)
+
+        shards = writer.close()
+        manifest = {
+            'format': 'tar',
+            'version': FORMAT_VERSION,
+            'created': time.time(),
+            'options': {'preprocessing': preprocessing, 'augmentation': augmentation,
+                        'variants': variants, 'seed': seed, 'deduplicate': deduplicate},
+            'records': sum(shard['records'] for shard in shards),
+            'shards': shards,
+            'sources': sources,
+        }
+        with open(artifact.file(MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    except BaseException:
+        writer.close()
+        store.discard(artifact)
+        raise
+    store.commit(artifact)
+
+    return {
+        "status": "success",
+        "artifact_id": artifact.id,
+        "seed": seed,
+        "records": manifest['records'],
+        "errors": sum('error' in source for source in sources),
+        "duplicates": sum('duplicate_of' in source for source in sources),
+        "manifest": store.url(artifact, MANIFEST_FILENAME),
+        "shards": [store.url(artifact, shard['tar']) for shard in shards],
+        "indexes": [store.url(artifact, shard['index']) for shard in shards],
+    }
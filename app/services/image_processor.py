@@ -1,35 +1,85 @@
 import numpy as np
 from PIL import Image
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from ..core.config import IMAGE_CONFIG
+from .seeding import Seed, spawn_generators
 
 class ImageProcessor:
     @staticmethod
-    def process(image: Image.Image, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool]) -> Dict[str, Image.Image]:
-        result = {
+    def process(image: Image.Image, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool],
+                progress: Optional[Callable[[str], None]] = None, variants: int = 1,
+                seed: Seed = None, out: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        preprocessed = ImageProcessor.preprocess(image, preprocessing_options, progress=progress)
+        augmented = ImageProcessor.augment(preprocessed, augmentation_options, variants, progress=progress,
+                                           seed=seed, out=out)
+        if augmented is None:
+            augmented = [image.copy()] * variants
+
+        return {
             "original": image,
-            "preprocessed": image.copy(),
-            "augmented": image.copy()
+            "preprocessed": preprocessed,
+            "augmented": augmented[0],
+            "variants": augmented
         }
-        
-        # Preprocessing
+
+    @staticmethod
+    def preprocess(image: Image.Image, preprocessing_options: Dict[str, bool],
+                   progress: Optional[Callable[[str], None]] = None) -> Image.Image:
+        image = image.copy()
+
         if preprocessing_options.get("resize"):
-            result["preprocessed"] = result["preprocessed"].resize(IMAGE_CONFIG['resize_size'])
-        
+            if progress:
+                progress("resize")
+            image = image.resize(IMAGE_CONFIG['resize_size'])
+
         if preprocessing_options.get("normalize"):
-            img_array = np.array(result["preprocessed"])
+            if progress:
+                progress("normalize")
+            img_array = np.array(image)
             img_array = img_array / 255.0
-            result["preprocessed"] = Image.fromarray((img_array * 255).astype(np.uint8))
-        
-        # Augmentation
+            image = Image.fromarray((img_array * 255).astype(np.uint8))
+
+        return image
+
+    @staticmethod
+    def augment(image: Image.Image, augmentation_options: Dict[str, bool], variants: int = 1,
+                progress: Optional[Callable[[str], None]] = None, seed: Seed = None,
+                out: Optional[np.ndarray] = None) -> Optional[List[Image.Image]]:
+        """Produce `variants` augmented copies of an image, or None if no augmentation is enabled.
+
+        Each copy draws from its own random stream derived from `seed`. Jittered
+        pixels are written into `out` when given (see `batch_shape`).
+        """
+        rngs = spawn_generators(seed, variants)
+        augmented = None
+
         if augmentation_options.get("flip"):
-            result["augmented"] = result["preprocessed"].transpose(Image.FLIP_LEFT_RIGHT)
-        
+            if progress:
+                progress("flip")
+            augmented = [image.transpose(Image.FLIP_LEFT_RIGHT)] * variants
+
         if augmentation_options.get("jitter"):
-            img_array = np.array(result["preprocessed"])
-            jitter = np.random.normal(0, 25, img_array.shape).astype(np.int16)
-            img_array = np.clip(img_array + jitter, 0, 255).astype(np.uint8)
-            result["augmented"] = Image.fromarray(img_array)
-        
-        return result 
\ No newline at end of file
+            if progress:
+                progress("jitter")
+            # One noise tensor of shape (variants, height, width, channels) for all copies
+            img_array = np.array(image)
+            jitter = np.empty((variants,) + img_array.shape, dtype=np.float32)
+            for rng, noise in zip(rngs, jitter):
+                rng.standard_normal(dtype=np.float32, out=noise)
+            jitter *= 25
+            batch = out if out is not None else np.empty(jitter.shape, dtype=np.uint8)
+            np.clip(img_array + jitter.astype(np.int16), 0, 255, out=batch, casting='unsafe')
+            augmented = [Image.fromarray(img) for img in batch]
+
+        return augmented
+
+    @staticmethod
+    def batch_shape(image: Image.Image, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool],
+                    variants: int = 1) -> Optional[Tuple[Tuple[int, ...], np.dtype]]:
+        """Shape and dtype of the `out` buffer `augment` fills, or None if it uses none."""
+        if not augmentation_options.get("jitter"):
+            return None
+        width, height = IMAGE_CONFIG['resize_size'] if preprocessing_options.get("resize") else image.size
+        bands = len(image.getbands())
+        return (variants, height, width) + ((bands,) if bands > 1 else ()), np.dtype(np.uint8)
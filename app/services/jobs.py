@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..core.config import JOB_CONFIG
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """A unit of work running in the job executor.
+
+    The work function receives a progress callback. Every call records an
+    event and is also a cancellation checkpoint: once the job is cancelled
+    the callback raises JobCancelled, stopping the work at the next step.
+    Calling it with None only checks for cancellation, for work that polls.
+    """
+
+    def __init__(self, fn: Callable[..., Any], args: tuple):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.stage: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.exception: Optional[Exception] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._fn = fn
+        self._args = args
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers: List[tuple] = []
+        self._callbacks: List[Callable[['Job'], None]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def progress(self, stage: Optional[str]) -> None:
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        if stage is None:
+            return
+        self.stage = stage
+        self._emit({'event': 'progress', 'stage': stage})
+
+    def add_done_callback(self, fn: Callable[['Job'], None]) -> None:
+        """Call ``fn(job)`` once the job finishes, or now if it already has."""
+        with self._lock:
+            if not self.done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def cancel(self) -> bool:
+        """Request cancellation. Returns False if the job already finished."""
+        with self._lock:
+            if self.done:
+                return False
+            self._cancelled.set()
+            queued = self.status == QUEUED
+        if queued:
+            # Work that never started can be finished immediately
+            self._finish(CANCELLED)
+        return True
+
+    def run(self) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.status = RUNNING
+        self._emit({'event': 'status', 'status': RUNNING})
+        try:
+            result = self._fn(*self._args, progress=self.progress)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            self.exception = e
+            self._finish(FAILED, error=str(e))
+        else:
+            self._finish(SUCCEEDED, result=result)
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            if self.done:
+                return
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+            callbacks, self._callbacks = self._callbacks, []
+        self._emit({'event': 'status', 'status': status})
+        for callback in callbacks:
+            callback(self)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        event = {'job_id': self.id, 'time': time.time(), **event}
+        with self._lock:
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's event loop has been closed
+                pass
+
+    async def stream(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield all past and future events until the job finishes."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            past = list(self.events)
+            subscriber = (loop, queue)
+            self._subscribers.append(subscriber)
+        try:
+            for event in past:
+                yield event
+                if event.get('status') in FINISHED:
+                    return
+            while True:
+                event = await queue.get()
+                yield event
+                if event.get('status') in FINISHED:
+                    return
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+
+    def take_result(self) -> Any:
+        """Return the result and drop the job's reference to it.
+
+        For large results handed to a single consumer, so the job history
+        does not keep them alive.
+        """
+        with self._lock:
+            result, self.result = self.result, None
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'created': self.created,
+            'finished': self.finished,
+            'error': self.error,
+            'result': self.result,
+        }
+
+
+class JobManager:
+    """Runs jobs on a thread pool and keeps a bounded history of finished jobs."""
+
+    def __init__(self, max_workers: int = JOB_CONFIG['max_workers'],
+                 max_finished_jobs: int = JOB_CONFIG['max_finished_jobs']):
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Job:
+        """Queue ``fn(*args, progress=...)`` and return its job immediately."""
+        job = Job(fn, args)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(job.run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job: Job) -> None:
+        """Wait for the job to finish without blocking the event loop."""
+        async for _ in job.stream():
+            pass
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
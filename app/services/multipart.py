@@ -0,0 +1,86 @@
+import gzip
+import io
+import json
+import uuid
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .pipeline import STAGES
+
+NPY_MEDIA_TYPE = 'application/x-npy'
+
+
+def npy_bytes(array: np.ndarray) -> bytes:
+    """Serialize an array in the .npy format (header followed by the raw data)."""
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _arrays(file_type: str, data: Any) -> List[Tuple[str, np.ndarray, Dict[str, Any]]]:
+    """Split one processed output into (suffix, array, extra metadata) triples."""
+    if file_type == 'image':
+        array = np.asarray(data)
+        if array.dtype == bool:
+            array = array.astype(np.uint8)
+        return [('', array, {'mode': data.mode})]
+    if file_type == 'audio':
+        samples, sr = data
+        return [('', np.asarray(samples, dtype=np.float32), {'sample_rate': sr})]
+    if file_type == '3d':
+        return [('.vertices', np.asarray(data.vertices, dtype=np.float32), {}),
+                ('.faces', np.asarray(data.faces, dtype=np.uint32), {})]
+    raise ValueError('Unsupported file type for array responses')
+
+
+def result_parts(result: Dict[str, Any]) -> Iterator[Tuple[Dict[str, str], bytes]]:
+    """Yield the (headers, body) of each part of an in-memory processing result.
+
+    The first part is a JSON description of the rest. Each stage, and each
+    extra variant as ``augmented_<i>``, follows as a .npy array (meshes as
+    ``<name>.vertices`` and ``<name>.faces``) or, for text, as gzipped UTF-8.
+    Parts are serialized one at a time as the iterator advances.
+    """
+    file_type = result['file_type']
+    processed_data = result['processed']
+    outputs = [(stage, processed_data[stage]) for stage in STAGES]
+    outputs += [(f'augmented_{i}', variant) for i, variant in enumerate(processed_data['variants'][1:], start=1)]
+
+    description = {key: value for key, value in result.items() if key != 'processed'}
+    description['parts'] = []
+    serialized = []
+    for name, data in outputs:
+        if data is None:
+            continue
+        if file_type == 'text':
+            description['parts'].append({'name': name, 'content_type': 'text/plain; charset=utf-8',
+                                         'content_encoding': 'gzip'})
+            serialized.append((name, data))
+            continue
+        for suffix, array, extra in _arrays(file_type, data):
+            description['parts'].append({'name': name + suffix, 'content_type': NPY_MEDIA_TYPE,
+                                         'shape': list(array.shape), 'dtype': array.dtype.str, **extra})
+            serialized.append((name + suffix, array))
+
+    yield {'Content-Type': 'application/json'}, json.dumps(description).encode('utf-8')
+    for name, value in serialized:
+        disposition = f'attachment; name="{name}"'
+        if file_type == 'text':
+            yield ({'Content-Type': 'text/plain; charset=utf-8', 'Content-Encoding': 'gzip',
+                    'Content-Disposition': disposition}, gzip.compress(value.encode('utf-8')))
+        else:
+            yield ({'Content-Type': NPY_MEDIA_TYPE, 'Content-Disposition': f'{disposition}; filename="{name}.npy"'},
+                   npy_bytes(value))
+
+
+def new_boundary() -> str:
+    return uuid.uuid4().hex
+
+
+def multipart_chunks(parts: Iterator[Tuple[Dict[str, str], bytes]], boundary: str) -> Iterator[bytes]:
+    """Frame parts as a multipart/mixed body, one chunk per part."""
+    for headers, body in parts:
+        head = f'--{boundary}\r\n' + ''.join(f'{key}: {value}\r\n' for key, value in headers.items()) + '\r\n'
+        yield head.encode('latin-1') + body + b'\r\n'
+    yield f'--{boundary}--\r\n'.encode('latin-1')
@@ -0,0 +1,83 @@
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import NEAR_DUPLICATE_CONFIG
+
+# Hash functions h(x) = (a * x + b) mod p over 32-bit shingle hashes; a, b < 2**31 keep a * x + b below 2**64
+_PRIME = np.uint64(4294967291)
+_PERMUTATIONS = np.random.default_rng(0x5EED).integers(1, 1 << 31, size=(2, 1024), dtype=np.uint64)
+
+
+def shingles(text: str, size: int = NEAR_DUPLICATE_CONFIG['shingle_size']) -> np.ndarray:
+    """Return the distinct 32-bit hashes of the character `size`-grams of a text.
+
+    Case and runs of whitespace are ignored, so reformatted copies of a
+    document share their shingles.
+    """
+    text = ' '.join(text.lower().split())
+    grams = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes: np.ndarray, num_perm: int = NEAR_DUPLICATE_CONFIG['num_perm'],
+            chunk_size: int = 4096) -> np.ndarray:
+    """MinHash signature of a shingle set: the minimum of each of `num_perm` hash functions.
+
+    The fraction of equal entries of two signatures estimates the Jaccard
+    similarity of their sets.
+    """
+    a, b = _PERMUTATIONS[0, :num_perm, None], _PERMUTATIONS[1, :num_perm, None]
+    signature = np.full(num_perm, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), chunk_size):
+        chunk = hashes[None, start:start + chunk_size]
+        np.minimum(signature, ((a * chunk + b) % _PRIME).min(axis=1), out=signature)
+    return signature
+
+
+def find_near_duplicates(texts: List[Optional[str]], threshold: float = NEAR_DUPLICATE_CONFIG['threshold'],
+                         num_perm: int = NEAR_DUPLICATE_CONFIG['num_perm'],
+                         bands: int = NEAR_DUPLICATE_CONFIG['bands']) -> Dict[int, Tuple[int, float]]:
+    """Cluster near-duplicate texts with MinHash locality-sensitive hashing.
+
+    Texts are taken in order. Each one that does not join a cluster starts
+    one as its representative, and its signature, split into `bands`
+    bands, is filed under one bucket per band. A later text is compared
+    only with the representatives sharing one of its buckets, so the work
+    grows with the number of texts rather than pairs. It joins the most
+    similar of them whose estimated Jaccard similarity reaches `threshold`.
+    Every member is therefore within the threshold of its representative,
+    and chains of small edits do not merge into one cluster. Texts given
+    as None are skipped.
+
+    Returns:
+        For every text that joined a cluster, the index of its
+        representative and their estimated similarity
+    """
+    rows = num_perm // bands
+    signatures: Dict[int, np.ndarray] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    duplicates: Dict[int, Tuple[int, float]] = {}
+    for index, text in enumerate(texts):
+        if text is None:
+            continue
+        signature = minhash(shingles(text), num_perm)
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+        candidates = sorted({representative for key in keys for representative in buckets.get(key, ())})
+
+        best = None
+        for representative in candidates:
+            similarity = float(np.mean(signatures[representative] == signature))
+            # Ties go to the earliest representative
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (representative, similarity)
+
+        if best is not None:
+            duplicates[index] = best
+        else:
+            signatures[index] = signature
+            for key in keys:
+                buckets[key].append(index)
+    return duplicates
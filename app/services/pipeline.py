@@ -0,0 +1,286 @@
+import io
+import os
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+import soundfile as sf
+import trimesh
+
+from ..core.config import PREVIEW_CONFIG
+from .artifacts import Artifact, ArtifactStore
+from .previews import write_preview
+from .seeding import Seed, new_seed
+from .shared_buffers import SharedArray, load_shared, unmap, unmap_payload
+from .text_processor import TextProcessor
+from .image_processor import ImageProcessor
+from .audio_processor import AudioProcessor
+from .three_d_processor import ThreeDProcessor
+
+if TYPE_CHECKING:
+    from .workers import ProcessWorkers
+
+STAGES = ['original', 'preprocessed', 'augmented']
+
+# File extension of each processed output, by file type
+EXTENSIONS = {'text': 'txt', 'image': 'png', 'audio': 'wav', '3d': 'obj'}
+
+
+def load(file_type: str, file_path: str, scale: float = 1.0) -> Any:
+    """Decode a file into the input of its processor.
+
+    Raises:
+        ValueError: If the file type cannot be processed
+    """
+    if file_type == 'text':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    if file_type == 'image':
+        image = Image.open(file_path)
+        if scale < 1.0:
+            image.thumbnail((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+        return image
+    if file_type == 'audio':
+        return sf.read(file_path)
+    if file_type == '3d':
+        return trimesh.load_mesh(file_path)
+    raise ValueError('Unsupported file type for processing')
+
+
+def process_data(file_type: str, data: Any, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                 progress: Optional[Callable[[str], None]] = None, variants: int = 1, seed: Seed = None,
+                 out: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Run the processor of a file type on data returned by `load`.
+
+    Augmented copies are written into `out` when it is given; see `batch_shape`.
+    """
+    if file_type == 'text':
+        return TextProcessor.process(data, preprocessing, augmentation, progress=progress,
+                                     variants=variants, seed=seed)
+    if file_type == 'image':
+        return ImageProcessor.process(data, preprocessing, augmentation, progress=progress,
+                                      variants=variants, seed=seed, out=out)
+    if file_type == 'audio':
+        return AudioProcessor.process(data[0], data[1], preprocessing, augmentation, progress=progress,
+                                      variants=variants, seed=seed, out=out)
+    if file_type == '3d':
+        return ThreeDProcessor.process(data, preprocessing, augmentation, progress=progress,
+                                       variants=variants, seed=seed, out=out)
+    raise ValueError('Unsupported file type for processing')
+
+
+def batch_shape(file_type: str, data: Any, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                variants: int = 1) -> Optional[Tuple[Tuple[int, ...], np.dtype]]:
+    """Shape and dtype of the augmentation output buffer `process_data` can fill, if any."""
+    if file_type == 'image':
+        return ImageProcessor.batch_shape(data, preprocessing, augmentation, variants)
+    if file_type == 'audio':
+        return AudioProcessor.batch_shape(data[0], data[1], preprocessing, augmentation, variants)
+    if file_type == '3d':
+        return ThreeDProcessor.batch_shape(data, preprocessing, augmentation, variants)
+    return None
+
+
+def run_processors(file_type: str, file_path: str, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                   progress: Optional[Callable[[str], None]] = None, scale: float = 1.0, variants: int = 1,
+                   seed: Seed = None) -> Dict[str, Any]:
+    """Load a file and run its processor, returning the processed data per stage.
+
+    Raises:
+        ValueError: If the file type cannot be processed
+    """
+    if progress:
+        progress("load")
+    data = load(file_type, file_path, scale)
+    return process_data(file_type, data, preprocessing, augmentation, progress=progress, variants=variants,
+                        seed=seed)
+
+
+def encode(file_type: str, data: Any) -> bytes:
+    """Serialize one processed output in the format given by EXTENSIONS."""
+    if file_type == 'text':
+        return data.encode('utf-8')
+    buffer = io.BytesIO()
+    if file_type == 'image':
+        data.save(buffer, format='PNG')
+    elif file_type == 'audio':
+        sf.write(buffer, data[0], data[1], format='WAV')
+    elif file_type == '3d':
+        data.export(buffer, file_type='obj')
+    else:
+        raise ValueError('Unsupported file type for processing')
+    return buffer.getvalue()
+
+
+def save_outputs(file_type: str, processed_data: Dict[str, Any], directory: str, base_name: str,
+                 variants: int = 1) -> Dict[str, Any]:
+    """Encode processed outputs, and their previews, into files in `directory`.
+
+    Returns:
+        Filename per stage, the preview filename per stage under "previews" and,
+        when `variants` > 1, the filenames of all copies under "variants"
+    """
+    extension = EXTENSIONS[file_type]
+
+    def save(data: Any, filename: str) -> str:
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(encode(file_type, data))
+        return filename
+
+    filenames = {}
+    previews = {}
+    for stage in STAGES:
+        if processed_data[stage] is not None:
+            filenames[stage] = save(processed_data[stage], f'{stage}_{base_name}.{extension}')
+            if PREVIEW_CONFIG['enabled']:
+                # Previews come from the data already in memory, not from the saved files
+                preview = write_preview(file_type, processed_data[stage], directory, f'{stage}_{base_name}')
+                if preview:
+                    previews[stage] = preview
+    if previews:
+        filenames["previews"] = previews
+    if variants > 1:
+        filenames["variants"] = [filenames["augmented"]]
+        for i, variant in enumerate(processed_data["variants"][1:], start=1):
+            filenames["variants"].append(save(variant, f'augmented_{i}_{base_name}.{extension}'))
+    return filenames
+
+
+def _process_shared(file_type: str, payload: Dict[str, Any], out: Optional[SharedArray],
+                    preprocessing: Dict[str, bool], augmentation: Dict[str, bool], directory: str, base_name: str,
+                    variants: int, seed: Seed) -> Dict[str, Any]:
+    data = load_shared(file_type, payload)
+    processed_data = process_data(file_type, data, preprocessing, augmentation, variants=variants, seed=seed,
+                                  out=out.attach() if out is not None else None)
+    return save_outputs(file_type, processed_data, directory, base_name, variants)
+
+
+def process_shared(file_type: str, payload: Dict[str, Any], out: Optional[SharedArray],
+                   preprocessing: Dict[str, bool], augmentation: Dict[str, bool], directory: str, base_name: str,
+                   variants: int = 1, seed: Seed = None) -> Dict[str, Any]:
+    """Worker process entry point: process shared buffers and save the outputs.
+
+    `payload` comes from `share_data` and `out`, if given, is a buffer of
+    `batch_shape` receiving the augmented copies, so no array is pickled in
+    either direction. Returns the filenames written, as `save_outputs`.
+    The segments are unmapped before returning, so the worker does not pin
+    them once the parent releases them.
+    """
+    try:
+        # Every view of the segments is gone once this returns
+        return _process_shared(file_type, payload, out, preprocessing, augmentation, directory, base_name,
+                               variants, seed)
+    finally:
+        unmap_payload(payload)
+        if out is not None:
+            unmap(out.path)
+
+
+def process_file(file_type: str, file_path: str, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                 store: ArtifactStore, progress: Optional[Callable[[str], None]] = None, scale: float = 1.0,
+                 variants: int = 1, seed: Optional[int] = None,
+                 workers: Optional['ProcessWorkers'] = None) -> Dict[str, Any]:
+    """Load, process and save a file, returning the `/preprocess` response body.
+
+    Args:
+        file_type: One of the keys of FILE_TYPES
+        file_path: Path of the uploaded file
+        preprocessing: Dictionary of preprocessing options and their states
+        augmentation: Dictionary of augmentation options and their states
+        store: Artifact store receiving the processed outputs
+        progress: Optional callback invoked with the name of each step before it runs.
+            It may raise to abort processing (see JobCancelled).
+        scale: Factor applied to image dimensions on load, set by admission control
+        variants: Number of independently augmented copies to produce from one decode.
+            When greater than 1 the response also lists every copy under "variants".
+        seed: Seed for the augmentation random streams. A fresh one is drawn when
+            None; either way it is returned as "seed" so the run can be reproduced.
+        workers: Worker processes to run the processor in. Text is always processed
+            in the calling thread.
+
+    Returns:
+        Dictionary with the status and, per stage, the text or the URL of the saved output.
+        For image, audio and 3D the preview URL of each stage is listed under "previews".
+
+    Raises:
+        ValueError: If the file type cannot be processed
+    """
+    if seed is None:
+        seed = new_seed()
+
+    if progress:
+        progress("load")
+    data = load(file_type, file_path, scale)
+
+    if file_type == 'text':
+        processed_data = process_data(file_type, data, preprocessing, augmentation, progress=progress,
+                                      variants=variants, seed=seed)
+        # For text, return content directly
+        result = {"status": "success", "seed": seed, **{stage: processed_data[stage] for stage in STAGES}}
+        if variants > 1:
+            result["variants"] = processed_data["variants"]
+        return result
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    # Save processed outputs as a new artifact for serving
+    artifact = store.create(kind='output', file_type=file_type, source=os.path.basename(file_path))
+    try:
+        if workers is not None:
+            filenames = workers.process(file_type, data, preprocessing, augmentation, str(artifact.path),
+                                        base_name, variants=variants, seed=seed, progress=progress)
+        else:
+            processed_data = process_data(file_type, data, preprocessing, augmentation, progress=progress,
+                                          variants=variants, seed=seed)
+            if progress:
+                progress("save")
+            filenames = save_outputs(file_type, processed_data, str(artifact.path), base_name, variants)
+    except BaseException:
+        store.discard(artifact)
+        raise
+    store.commit(artifact)
+
+    output_paths = {"artifact_id": artifact.id, "seed": seed}
+    for stage, filename in filenames.items():
+        if stage == "variants":
+            output_paths[stage] = [store.url(artifact, name) for name in filename]
+        elif stage == "previews":
+            output_paths[stage] = {name: store.url(artifact, preview) for name, preview in filename.items()}
+        else:
+            output_paths[stage] = store.url(artifact, filename)
+
+    if scale < 1.0:
+        output_paths["scale"] = scale
+
+    return {"status": "success", **output_paths}
+
+
+def process_upload(upload: Artifact, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                   store: ArtifactStore, progress: Optional[Callable[[str], None]] = None,
+                   scale: float = 1.0, variants: int = 1, seed: Optional[int] = None,
+                   workers: Optional['ProcessWorkers'] = None) -> Dict[str, Any]:
+    """Process an uploaded artifact, keeping it from being evicted meanwhile."""
+    with store.pinned(upload.id):
+        return process_file(upload.meta['file_type'], str(upload.file(upload.meta['filename'])),
+                            preprocessing, augmentation, store, progress=progress, scale=scale,
+                            variants=variants, seed=seed, workers=workers)
+
+
+def process_upload_data(upload: Artifact, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                        store: ArtifactStore, progress: Optional[Callable[[str], None]] = None,
+                        scale: float = 1.0, variants: int = 1, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Process an uploaded artifact without saving anything.
+
+    Returns:
+        Dictionary with the status, file type and seed, and the processor output under "processed"
+    """
+    if seed is None:
+        seed = new_seed()
+    file_type = upload.meta['file_type']
+    with store.pinned(upload.id):
+        processed_data = run_processors(file_type, str(upload.file(upload.meta['filename'])), preprocessing,
+                                        augmentation, progress=progress, scale=scale, variants=variants, seed=seed)
+    result = {"status": "success", "file_type": file_type, "seed": seed, "processed": processed_data}
+    if scale < 1.0:
+        result["scale"] = scale
+    return result
@@ -0,0 +1,144 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+import trimesh
+
+from ..core.config import PREVIEW_CONFIG
+
+# Candidate grid resolutions for vertex clustering, coarsest first
+_LOD_GRIDS = [4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+
+
+def thumbnail(image: Image.Image, size=PREVIEW_CONFIG['thumbnail_size']) -> Image.Image:
+    """Return a copy of an image shrunk to fit `size`, in RGB for JPEG encoding."""
+    thumb = image.convert('RGB') if image.mode != 'RGB' else image.copy()
+    thumb.thumbnail(size)
+    return thumb
+
+
+def waveform_peaks(audio_data: np.ndarray, sr: int, max_peaks: int = PREVIEW_CONFIG['waveform_max_peaks'],
+                   min_peaks: int = PREVIEW_CONFIG['waveform_min_peaks']) -> Dict[str, Any]:
+    """Build a min/max peak pyramid of a signal, mixed down to mono.
+
+    Level 0 holds at most `max_peaks` (max, min) pairs over blocks of a
+    power-of-two number of samples; each further level halves the
+    resolution, down to about `min_peaks` pairs. Peaks are quantized to
+    integers in [-127, 127] and interleaved max first, as WaveSurfer expects.
+    """
+    samples = np.asarray(audio_data, dtype=np.float32)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+
+    block = 1
+    while -(-len(samples) // block) > max_peaks:
+        block *= 2
+    count = -(-len(samples) // block)
+    padded = np.zeros(count * block, dtype=np.float32)
+    padded[:len(samples)] = samples
+    blocks = padded.reshape(count, block)
+    highs, lows = blocks.max(axis=1), blocks.min(axis=1)
+
+    peak = max(float(np.abs(samples).max()) if len(samples) else 0.0, 1e-9)
+    levels = []
+    while True:
+        pairs = np.empty(2 * len(highs), dtype=np.int8)
+        pairs[0::2] = np.round(np.clip(highs / peak, -1, 1) * 127)
+        pairs[1::2] = np.round(np.clip(lows / peak, -1, 1) * 127)
+        levels.append({'samples_per_peak': block, 'peaks': pairs.tolist()})
+        if len(highs) < 2 * min_peaks:
+            break
+        # Pair up neighbouring blocks; an odd last block is carried as is
+        even = len(highs) // 2 * 2
+        highs = np.append(np.maximum(highs[0:even:2], highs[1:even:2]), highs[even:])
+        lows = np.append(np.minimum(lows[0:even:2], lows[1:even:2]), lows[even:])
+        block *= 2
+
+    return {'sample_rate': sr, 'length': len(samples), 'duration': len(samples) / sr,
+            'scale': peak, 'levels': levels}
+
+
+def cluster_vertices(vertices: np.ndarray, faces: np.ndarray, grid: int) -> Dict[str, np.ndarray]:
+    """Decimate a mesh by merging the vertices in each cell of a grid x grid x grid lattice.
+
+    Each cluster is replaced by the mean of its vertices; faces that collapse
+    or duplicate another face are dropped.
+    """
+    low = vertices.min(axis=0)
+    cell = max(float((vertices.max(axis=0) - low).max()), 1e-12) / grid
+    cells = np.minimum(((vertices - low) / cell).astype(np.int64), grid - 1)
+    keys = (cells[:, 0] * grid + cells[:, 1]) * grid + cells[:, 2]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    merged = np.zeros((len(counts), 3))
+    np.add.at(merged, inverse, vertices)
+    merged /= counts[:, None]
+
+    clustered = inverse[faces]
+    distinct = ((clustered[:, 0] != clustered[:, 1]) & (clustered[:, 1] != clustered[:, 2])
+                & (clustered[:, 0] != clustered[:, 2]))
+    clustered = clustered[distinct]
+    _, first = np.unique(np.sort(clustered, axis=1), axis=0, return_index=True)
+    return {'vertices': merged, 'faces': clustered[np.sort(first)]}
+
+
+def mesh_lods(mesh: trimesh.Trimesh, face_counts: List[int] = PREVIEW_CONFIG['lod_face_counts']) -> Dict[str, Any]:
+    """Build levels of detail of a mesh, coarsest first, each within a face budget.
+
+    Positions are quantized to 16 bits within the mesh bounding box. The
+    last level is the full mesh when it fits the largest budget.
+    """
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    faces = np.asarray(mesh.faces, dtype=np.int64)
+    if not len(vertices) or not len(faces):
+        return {'bbox': [[0, 0, 0], [0, 0, 0]], 'faces': 0, 'levels': []}
+
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+    extent = np.where(high > low, high - low, 1.0)
+
+    def level(level_vertices: np.ndarray, level_faces: np.ndarray) -> Dict[str, Any]:
+        positions = np.round((level_vertices - low) / extent * 65535).astype(np.uint16)
+        return {'faces': len(level_faces), 'positions': positions.reshape(-1).tolist(),
+                'indices': level_faces.reshape(-1).tolist()}
+
+    levels = []
+    for budget in sorted(face_counts):
+        if len(faces) <= budget:
+            levels.append(level(vertices, faces))
+            break
+        best = None
+        for grid in _LOD_GRIDS:
+            decimated = cluster_vertices(vertices, faces, grid)
+            if len(decimated['faces']) > budget:
+                break
+            best = decimated
+        if best is not None and (not levels or best['faces'].shape[0] > levels[-1]['faces']):
+            levels.append(level(best['vertices'], best['faces']))
+
+    return {'bbox': [low.tolist(), high.tolist()], 'faces': len(faces), 'levels': levels}
+
+
+def write_preview(file_type: str, data: Any, directory: str, name: str) -> Optional[str]:
+    """Write the preview of one processed output and return its filename.
+
+    Images get a JPEG thumbnail, audio a JSON peak pyramid and meshes JSON
+    levels of detail. Returns None for types without previews.
+    """
+    if file_type == 'image':
+        filename = f'{name}.thumb.jpg'
+        thumbnail(data).save(os.path.join(directory, filename), format='JPEG',
+                             quality=PREVIEW_CONFIG['thumbnail_quality'])
+        return filename
+    if file_type == 'audio':
+        preview = waveform_peaks(data[0], data[1])
+    elif file_type == '3d':
+        preview = mesh_lods(data)
+    else:
+        return None
+    filename = f'{name}.preview.json'
+    with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+        json.dump(preview, f, separators=(',', ':'))
+    return filename
@@ -0,0 +1,38 @@
+import secrets
+from typing import List, Union
+
+import numpy as np
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+# Largest seed drawn by new_seed(); integers up to 2**53 survive a JSON round trip in browsers
+MAX_SEED = 2 ** 53 - 1
+
+
+def new_seed() -> int:
+    """Draw a fresh seed that can be reported back to clients and reused."""
+    return secrets.randbelow(MAX_SEED + 1)
+
+
+def as_seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """Return a SeedSequence for a seed, drawing fresh entropy when it is None."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def spawn_seeds(seed: Seed, count: int) -> List[np.random.SeedSequence]:
+    """Derive `count` independent child seeds from a seed.
+
+    Unlike SeedSequence.spawn this does not mutate the parent, so child i
+    depends only on the seed and on i: variant i of a job is the same no
+    matter how many variants are requested or how often the seed is reused.
+    """
+    parent = as_seed_sequence(seed)
+    return [np.random.SeedSequence(parent.entropy, spawn_key=parent.spawn_key + (i,), pool_size=parent.pool_size)
+            for i in range(count)]
+
+
+def spawn_generators(seed: Seed, count: int) -> List[np.random.Generator]:
+    """Create `count` independent random generators from a seed."""
+    return [np.random.default_rng(child) for child in spawn_seeds(seed, count)]
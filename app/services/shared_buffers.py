@@ -0,0 +1,220 @@
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+import trimesh
+
+from ..core.config import SHARED_MEMORY_CONFIG
+
+# Segments mapped by this process, most recently used last
+_mapped: 'OrderedDict[str, mmap.mmap]' = OrderedDict()
+_mapped_bytes = 0
+_mapped_lock = threading.Lock()
+
+
+def _map(path: str) -> mmap.mmap:
+    """Map a segment file, reusing the mapping of earlier calls in this process."""
+    global _mapped_bytes
+    with _mapped_lock:
+        segment = _mapped.get(path)
+        if segment is not None:
+            _mapped.move_to_end(path)
+            return segment
+        with open(path, 'r+b') as f:
+            segment = mmap.mmap(f.fileno(), 0)
+        _mapped[path] = segment
+        _mapped_bytes += len(segment)
+        # Arrays viewing a dropped mapping keep it alive until they are gone
+        while _mapped_bytes > SHARED_MEMORY_CONFIG['max_mapped_mb'] << 20 and len(_mapped) > 1:
+            _mapped_bytes -= len(_mapped.popitem(last=False)[1])
+        return segment
+
+
+def unmap(path: str) -> None:
+    """Drop this process's mapping of a segment, unmapping it unless arrays still view it.
+
+    A deleted segment keeps its memory until every process has unmapped it.
+    """
+    global _mapped_bytes
+    with _mapped_lock:
+        segment = _mapped.pop(path, None)
+        if segment is None:
+            return
+        _mapped_bytes -= len(segment)
+    try:
+        segment.close()
+    except BufferError:
+        pass  # unmapped once the last view is garbage collected
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable descriptor of an array held in a shared segment.
+
+    Only the descriptor crosses process boundaries; `attach` maps the
+    segment and returns a view of the array without copying it.
+    """
+    path: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+    def attach(self) -> np.ndarray:
+        return np.ndarray(self.shape, np.dtype(self.dtype), buffer=_map(self.path))
+
+
+class SegmentPool:
+    """Pooled, reference-counted allocator of shared memory segments.
+
+    Segments are memory-mapped files in a private directory (under /dev/shm
+    where available), so any process on the host can map them by path.
+    Sizes are rounded up to a power of two. Each holder of a segment owns a
+    reference: `allocate` returns one and `retain` adds one, e.g. for a
+    worker task that may outlive the caller's wait. The last `release`
+    returns the segment for reuse by later allocations of the same size
+    class, up to ``max_free_bytes`` in total, and deletes it beyond that.
+    """
+
+    def __init__(self, directory: str = SHARED_MEMORY_CONFIG['directory'],
+                 max_free_bytes: int = SHARED_MEMORY_CONFIG['pool_size_mb'] << 20,
+                 min_segment_bytes: int = SHARED_MEMORY_CONFIG['min_segment_kb'] << 10):
+        if directory and not os.path.isdir(directory):
+            directory = None
+        self.directory = tempfile.mkdtemp(prefix='segments-', dir=directory)
+        self.max_free_bytes = max_free_bytes
+        self.min_segment_bytes = min_segment_bytes
+        self.free_bytes = 0
+        self.used_bytes = 0
+        self._free: Dict[int, List[str]] = defaultdict(list)
+        self._sizes: Dict[str, int] = {}
+        self._refs: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _size_class(self, nbytes: int) -> int:
+        return max(self.min_segment_bytes, 1 << max(nbytes - 1, 0).bit_length())
+
+    def allocate(self, shape: Tuple[int, ...], dtype: Any) -> SharedArray:
+        """Reserve a segment for an array. Its contents are undefined."""
+        array = SharedArray('', tuple(int(n) for n in shape), np.dtype(dtype).str)
+        size = self._size_class(array.nbytes)
+        with self._lock:
+            if self._free[size]:
+                path = self._free[size].pop()
+                self.free_bytes -= size
+            else:
+                path = os.path.join(self.directory, uuid.uuid4().hex)
+                with open(path, 'wb') as f:
+                    f.truncate(size)
+                self._sizes[path] = size
+            self._refs[path] = 1
+            self.used_bytes += size
+        return SharedArray(path, array.shape, array.dtype)
+
+    def share(self, array: np.ndarray) -> SharedArray:
+        """Copy an array into a new segment."""
+        shared = self.allocate(array.shape, array.dtype)
+        shared.attach()[...] = array
+        return shared
+
+    def retain(self, shared: SharedArray) -> None:
+        """Add a reference for another holder of the segment."""
+        with self._lock:
+            self._refs[shared.path] += 1
+
+    def release(self, shared: SharedArray) -> None:
+        """Drop a reference; the last one returns the segment to the pool."""
+        with self._lock:
+            self._refs[shared.path] -= 1
+            if self._refs[shared.path] > 0:
+                return
+            del self._refs[shared.path]
+            size = self._sizes.get(shared.path)
+            if size is None:
+                return  # deleted by close()
+            self.used_bytes -= size
+            if self.free_bytes + size <= self.max_free_bytes:
+                self._free[size].append(shared.path)
+                self.free_bytes += size
+                return
+            del self._sizes[shared.path]
+        self._delete(shared.path)
+
+    def _delete(self, path: str) -> None:
+        unmap(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """Delete every segment. Arrays still viewing one stay valid until dropped."""
+        with self._lock:
+            paths = list(self._sizes)
+            self._sizes.clear()
+            self._free.clear()
+            self._refs.clear()
+            self.free_bytes = self.used_bytes = 0
+        for path in paths:
+            self._delete(path)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def as_shareable(file_type: str, data: Any) -> Any:
+    """Convert decoded data that `share_data` cannot represent faithfully."""
+    if file_type == 'image' and data.mode in ('CMYK', 'YCbCr', 'LAB', 'HSV'):
+        # These modes do not survive a round trip through a plain array
+        return data.convert('RGB')
+    return data
+
+
+def share_data(file_type: str, data: Any, pool: SegmentPool) -> Dict[str, Any]:
+    """Place the buffers of a decoded file in shared segments.
+
+    Returns a small picklable payload for `load_shared`.
+    """
+    data = as_shareable(file_type, data)
+    if file_type == 'image':
+        payload = {'pixels': pool.share(np.asarray(data))}
+        if data.mode == 'P':
+            payload['palette'] = data.getpalette()
+        return payload
+    if file_type == 'audio':
+        audio_data, sr = data
+        return {'samples': pool.share(np.ascontiguousarray(audio_data)), 'sr': sr}
+    if file_type == '3d':
+        return {'vertices': pool.share(np.asarray(data.vertices, dtype=np.float64)),
+                'faces': pool.share(np.asarray(data.faces)), 'metadata': data.metadata}
+    raise ValueError('Unsupported file type for shared memory transfer')
+
+
+def load_shared(file_type: str, payload: Dict[str, Any]) -> Any:
+    """Rebuild the decoded file from a `share_data` payload, viewing the shared buffers."""
+    if file_type == 'image':
+        image = Image.fromarray(payload['pixels'].attach())
+        if 'palette' in payload:
+            image.putpalette(payload['palette'])
+        return image
+    if file_type == 'audio':
+        return payload['samples'].attach(), payload['sr']
+    if file_type == '3d':
+        return trimesh.Trimesh(vertices=payload['vertices'].attach(), faces=payload['faces'].attach(),
+                               metadata=payload['metadata'], process=False)
+    raise ValueError('Unsupported file type for shared memory transfer')
+
+
+def unmap_payload(payload: Dict[str, Any]) -> None:
+    """Drop the mappings of a payload's segments in this process (see `unmap`)."""
+    for value in payload.values():
+        if isinstance(value, SharedArray):
+            unmap(value.path)
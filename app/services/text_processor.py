@@ -4,69 +4,117 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer, WordNetLemmatizer
 from nltk.corpus import wordnet
-import random
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
+
+from .seeding import Seed, spawn_generators
 
 class TextProcessor:
     @staticmethod
-    def process(text: str, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool]) -> Dict[str, str]:
-        result = {"original": text, "preprocessed": text, "augmented": text}
-        
-        # Preprocessing
+    def process(text: str, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool],
+                progress: Optional[Callable[[str], None]] = None, variants: int = 1,
+                seed: Seed = None) -> Dict[str, Any]:
+        preprocessed = TextProcessor.preprocess(text, preprocessing_options, progress=progress)
+        augmented = TextProcessor.augment(preprocessed, augmentation_options, variants, progress=progress,
+                                          seed=seed)
+        if augmented is None:
+            augmented = [text] * variants
+
+        return {
+            "original": text,
+            "preprocessed": preprocessed,
+            "augmented": augmented[0],
+            "variants": augmented
+        }
+
+    @staticmethod
+    def preprocess(text: str, preprocessing_options: Dict[str, bool],
+                   progress: Optional[Callable[[str], None]] = None) -> str:
         if preprocessing_options.get("cleaning"):
+            if progress:
+                progress("cleaning")
             text = text.replace('\n', ' ').strip()
             text = ' '.join(text.split())
         
         if preprocessing_options.get("lowercase"):
+            if progress:
+                progress("lowercase")
             text = text.lower()
         
         if preprocessing_options.get("stopwords"):
+            if progress:
+                progress("stopwords")
             stop_words = set(stopwords.words('english'))
             words = word_tokenize(text)
             text = ' '.join([word for word in words if word.lower() not in stop_words])
         
         if preprocessing_options.get("stemming"):
+            if progress:
+                progress("stemming")
             stemmer = PorterStemmer()
             words = word_tokenize(text)
             text = ' '.join([stemmer.stem(word) for word in words])
         
         if preprocessing_options.get("lemmatization"):
+            if progress:
+                progress("lemmatization")
             lemmatizer = WordNetLemmatizer()
             words = word_tokenize(text)
             text = ' '.join([lemmatizer.lemmatize(word) for word in words])
         
         if preprocessing_options.get("tokenization"):
+            if progress:
+                progress("tokenization")
             text = ' '.join(word_tokenize(text))
         
-        result["preprocessed"] = text
-        
-        # Augmentation
-        if augmentation_options.get("synonym"):
-            words = word_tokenize(text)
-            augmented_words = []
-            for word in words:
+        return text
+
+    @staticmethod
+    def augment(text: str, augmentation_options: Dict[str, bool], variants: int = 1,
+                progress: Optional[Callable[[str], None]] = None, seed: Seed = None) -> Optional[List[str]]:
+        """Produce `variants` augmented copies of a text, or None if no augmentation is enabled.
+
+        Each copy draws from its own random stream derived from `seed`.
+        """
+        if not (augmentation_options.get("synonym") or augmentation_options.get("insertion")):
+            return None
+
+        rngs = spawn_generators(seed, variants)
+
+        # Tokenize once and look up each distinct word once for all variants
+        words = word_tokenize(text)
+        synonym_cache = {}
+
+        def synonyms_of(word: str) -> List[str]:
+            if word not in synonym_cache:
                 synsets = wordnet.synsets(word)
-                if synsets:
-                    synonyms = [lemma.name() for synset in synsets for lemma in synset.lemmas()]
-                    if synonyms:
-                        augmented_words.append(random.choice(synonyms))
-                    else:
-                        augmented_words.append(word)
-                else:
-                    augmented_words.append(word)
-            result["augmented"] = ' '.join(augmented_words)
-        
+                synonym_cache[word] = [lemma.name() for synset in synsets for lemma in synset.lemmas()]
+            return synonym_cache[word]
+
+        augmented = None
+
+        if augmentation_options.get("synonym"):
+            if progress:
+                progress("synonym")
+            augmented = []
+            for rng in rngs:
+                augmented_words = []
+                for word in words:
+                    synonyms = synonyms_of(word)
+                    augmented_words.append(synonyms[rng.integers(len(synonyms))] if synonyms else word)
+                augmented.append(' '.join(augmented_words))
+
         if augmentation_options.get("insertion"):
-            words = word_tokenize(text)
-            augmented_words = []
-            for word in words:
-                augmented_words.append(word)
-                if random.random() < 0.3:
-                    synsets = wordnet.synsets(word)
-                    if synsets:
-                        synonyms = [lemma.name() for synset in synsets for lemma in synset.lemmas()]
+            if progress:
+                progress("insertion")
+            augmented = []
+            for rng in rngs:
+                augmented_words = []
+                for word in words:
+                    augmented_words.append(word)
+                    if rng.random() < 0.3:
+                        synonyms = synonyms_of(word)
                         if synonyms:
-                            augmented_words.append(random.choice(synonyms))
-            result["augmented"] = ' '.join(augmented_words)
-        
-        return result 
\ No newline at end of file
+                            augmented_words.append(synonyms[rng.integers(len(synonyms))])
+                augmented.append(' '.join(augmented_words))
+
+        return augmented
@@ -1,34 +1,91 @@
 import numpy as np
 import trimesh
-import random
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from ..core.config import THREE_D_CONFIG
+from .seeding import Seed, spawn_generators
 
 class ThreeDProcessor:
     @staticmethod
-    def process(mesh: trimesh.Trimesh, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool]) -> Dict[str, trimesh.Trimesh]:
-        result = {
+    def process(mesh: trimesh.Trimesh, preprocessing_options: Dict[str, bool], augmentation_options: Dict[str, bool],
+                progress: Optional[Callable[[str], None]] = None, variants: int = 1,
+                seed: Seed = None, out: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        preprocessed = ThreeDProcessor.preprocess(mesh, preprocessing_options, progress=progress)
+        augmented = ThreeDProcessor.augment(preprocessed, augmentation_options, variants, progress=progress,
+                                            seed=seed, out=out)
+        if augmented is None:
+            augmented = [mesh.copy()] * variants
+
+        return {
             "original": mesh,
-            "preprocessed": mesh.copy(),
-            "augmented": mesh.copy()
+            "preprocessed": preprocessed,
+            "augmented": augmented[0],
+            "variants": augmented
         }
-        
-        # Preprocessing
+
+    @staticmethod
+    def preprocess(mesh: trimesh.Trimesh, preprocessing_options: Dict[str, bool],
+                   progress: Optional[Callable[[str], None]] = None) -> trimesh.Trimesh:
+        mesh = mesh.copy()
+
         if preprocessing_options.get("normalize"):
-            result["preprocessed"].vertices = result["preprocessed"].vertices / np.max(np.abs(result["preprocessed"].vertices))
-        
+            if progress:
+                progress("normalize")
+            mesh.vertices = mesh.vertices / np.max(np.abs(mesh.vertices))
+
         if preprocessing_options.get("center"):
-            centroid = result["preprocessed"].centroid
-            result["preprocessed"].vertices = result["preprocessed"].vertices - centroid
-        
-        # Augmentation
+            if progress:
+                progress("center")
+            centroid = mesh.centroid
+            mesh.vertices = mesh.vertices - centroid
+
+        return mesh
+
+    @staticmethod
+    def augment(mesh: trimesh.Trimesh, augmentation_options: Dict[str, bool], variants: int = 1,
+                progress: Optional[Callable[[str], None]] = None,
+                seed: Seed = None, out: Optional[np.ndarray] = None) -> Optional[List[trimesh.Trimesh]]:
+        """Produce `variants` augmented copies of a mesh, or None if no augmentation is enabled.
+
+        Each copy draws from its own random stream derived from `seed`. Vertex
+        batches are computed in `out` when given (see `batch_shape`).
+        """
+        rngs = spawn_generators(seed, variants)
+        vertices = np.asarray(mesh.vertices)
+        batch = None
+
+        # Vertex batches have shape (variants, n_vertices, 3)
         if augmentation_options.get("scale"):
-            scale_factor = np.random.uniform(*THREE_D_CONFIG['scale_range'])
-            result["augmented"].vertices = result["preprocessed"].vertices * scale_factor
-        
+            if progress:
+                progress("scale")
+            scale_factors = np.array([rng.uniform(*THREE_D_CONFIG['scale_range']) for rng in rngs])
+            batch = out if out is not None else np.empty((variants,) + vertices.shape)
+            np.multiply(vertices, scale_factors[:, None, None], out=batch)
+
         if augmentation_options.get("noise"):
-            noise = np.random.normal(0, THREE_D_CONFIG['noise_level'], result["preprocessed"].vertices.shape)
-            result["augmented"].vertices = result["preprocessed"].vertices + noise
-        
-        return result 
\ No newline at end of file
+            if progress:
+                progress("noise")
+            batch = out if out is not None else np.empty((variants,) + vertices.shape)
+            for rng, variant_noise in zip(rngs, batch):
+                rng.standard_normal(out=variant_noise)
+            batch *= THREE_D_CONFIG['noise_level']
+            batch += vertices
+
+        if batch is None:
+            return None
+
+        augmented = []
+        for variant_vertices in batch:
+            variant = mesh.copy()
+            variant.vertices = variant_vertices
+            augmented.append(variant)
+        return augmented
+
+    @staticmethod
+    def batch_shape(mesh: trimesh.Trimesh, preprocessing_options: Dict[str, bool],
+                    augmentation_options: Dict[str, bool],
+                    variants: int = 1) -> Optional[Tuple[Tuple[int, ...], np.dtype]]:
+        """Shape and dtype of the `out` buffer `augment` fills, or None if it uses none."""
+        if not (augmentation_options.get("scale") or augmentation_options.get("noise")):
+            return None
+        return (variants, len(mesh.vertices), 3), np.dtype(np.float64)
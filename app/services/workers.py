@@ -0,0 +1,115 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.config import SHARED_MEMORY_CONFIG
+from .pipeline import batch_shape, process_shared
+from .seeding import Seed
+from .shared_buffers import SegmentPool, SharedArray, as_shareable, share_data
+
+# Seconds between cancellation checks while a worker runs a job
+CANCEL_POLL_INTERVAL = 0.5
+
+
+class ProcessWorkers:
+    """Runs processors in worker processes, passing buffers through shared memory.
+
+    The decoded input and the augmentation output batch are placed in
+    segments of a `SegmentPool`; workers receive only their descriptors,
+    process the buffers in place and write the encoded outputs to disk
+    themselves, so no array is pickled in either direction.
+
+    The job thread and the worker task each hold a reference to the
+    segments. A cancelled job stops waiting right away and drops its own;
+    a worker cannot be interrupted, so it finishes the current file and the
+    segments return to the pool only when its task ends.
+    """
+
+    def __init__(self, processes: int = SHARED_MEMORY_CONFIG['worker_processes']):
+        self.processes = processes
+        self.pool: Optional[SegmentPool] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Create the segment pool and the worker processes.
+
+        Called by the app on startup, and on first use by callers that skip it.
+        """
+        with self._lock:
+            if self.executor is not None:
+                return
+            self.pool = SegmentPool()
+            # Spawned workers do not inherit the job threads or their locks
+            self.executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+
+    def process(self, file_type: str, data: Any, preprocessing: Dict[str, bool], augmentation: Dict[str, bool],
+                directory: str, base_name: str, variants: int = 1, seed: Seed = None,
+                progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Process decoded data in a worker and save the outputs into `directory`.
+
+        `progress` is called before the data is submitted, polled while the
+        worker runs and called again once it is done, so a cancelled job
+        raises JobCancelled without waiting for the worker.
+
+        Returns:
+            Filename per stage, as `save_outputs`
+        """
+        if progress:
+            progress("process")
+        self.start()
+        data = as_shareable(file_type, data)
+        payload = share_data(file_type, data, self.pool)
+        spec = batch_shape(file_type, data, preprocessing, augmentation, variants)
+        out = self.pool.allocate(*spec) if spec else None
+        segments = [value for value in payload.values() if isinstance(value, SharedArray)]
+        segments += [out] if out is not None else []
+        try:
+            future = self._submit(segments, process_shared, file_type, payload, out, preprocessing, augmentation,
+                                  directory, base_name, variants, seed)
+            while True:
+                try:
+                    filenames = future.result(timeout=CANCEL_POLL_INTERVAL)
+                    break
+                except TimeoutError:
+                    if progress:
+                        try:
+                            progress(None)
+                        except BaseException:
+                            # Drops the task if no worker has started it yet
+                            future.cancel()
+                            raise
+        finally:
+            self._release(segments)
+        if progress:
+            progress("save")
+        return filenames
+
+    def _submit(self, segments: List[SharedArray], fn: Callable[..., Any], *args):
+        """Submit a task holding its own reference to `segments` until it ends, however it ends."""
+        for shared in segments:
+            self.pool.retain(shared)
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release(segments)
+            raise
+        pool = self.pool
+        future.add_done_callback(lambda _: self._release(segments, pool))
+        return future
+
+    def _release(self, segments: List[SharedArray], pool: Optional[SegmentPool] = None) -> None:
+        pool = pool or self.pool
+        if pool is None:
+            return  # shut down: every segment is already deleted
+        for shared in segments:
+            pool.release(shared)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self.executor is None:
+                return
+            self.executor.shutdown(cancel_futures=True)
+            self.pool.close()
+            self.executor = self.pool = None
@@ -4,6 +4,36 @@
 // The tab switching is handled by Bootstrap's data-bs-toggle and data-bs-target attributes in the HTML.
 // No custom JavaScript is needed for basic tab switching.
 
+// SHA-256 of a file as hex, or null where Web Crypto is unavailable (insecure origins)
+async function fileSha256(file) {
+    if (!window.crypto || !crypto.subtle) {
+        return null;
+    }
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadFile(file, formData) {
+    const sha256 = await fileSha256(file);
+    if (sha256) {
+        const response = await fetch(`/uploads/${sha256}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ filename: file.name })
+        });
+        if (response.status !== 404) {
+            return response.json();
+        }
+    }
+    const uploadResponse = await fetch('/upload', {
+        method: 'POST',
+        body: formData
+    });
+    return uploadResponse.json();
+}
+
 // Generic data processing function
 async function processData(dataType, form) {
     const fileInput = form.querySelector('input[type="file"]');
@@ -35,12 +65,8 @@ async function processData(dataType, form) {
         submitButton.disabled = true;
         submitButton.textContent = 'Processing...';
 
-        // Upload file
-        const uploadResponse = await fetch('/upload', {
-            method: 'POST',
-            body: formData
-        });
-        const uploadResult = await uploadResponse.json();
+        // Upload file, skipping the transfer if the server already has its contents
+        const uploadResult = await uploadFile(file, formData);
         
         if (uploadResult.status === 'success') {
             // Process file
@@ -52,6 +78,7 @@ async function processData(dataType, form) {
                 body: JSON.stringify({
                     preprocessing,
                     augmentation,
+                    file_id: uploadResult.file_id,
                     file_type: dataType === 'three-d' ? '3d' : dataType
                 })
             });
@@ -108,20 +135,22 @@ function updateImagePreviews(result) {
     if (!previewContainer) return;
 
     const previews = previewContainer.querySelectorAll('.img-preview');
+    // Show the small server-side thumbnails; each links to the full output
+    const thumbnails = result.previews || {};
     
     if (previews[0]) {
         previews[0].innerHTML = result.original ? 
-            `<img src="${result.original}" alt="Original" class="img-preview">` : 
+            `<a href="${result.original}" target="_blank"><img src="${thumbnails.original || result.original}" alt="Original" class="img-preview"></a>` : 
             'No image available';
     }
     if (previews[1]) {
         previews[1].innerHTML = result.preprocessed ? 
-            `<img src="${result.preprocessed}" alt="Preprocessed" class="img-preview">` : 
+            `<a href="${result.preprocessed}" target="_blank"><img src="${thumbnails.preprocessed || result.preprocessed}" alt="Preprocessed" class="img-preview"></a>` : 
             'No preprocessed image available';
     }
     if (previews[2]) {
         previews[2].innerHTML = result.augmented ? 
-            `<img src="${result.augmented}" alt="Augmented" class="img-preview">` : 
+            `<a href="${result.augmented}" target="_blank"><img src="${thumbnails.augmented || result.augmented}" alt="Augmented" class="img-preview"></a>` : 
             'No augmented image available';
     }
 }
@@ -131,30 +160,31 @@ function updateAudioPreviews(result) {
     if (!previewContainer) return;
 
     const previews = previewContainer.querySelectorAll('.audio-preview');
+    const peaks = result.previews || {};
     
     if (previews[0]) {
         previews[0].innerHTML = result.original ? 
-            `<audio controls src="${result.original}" class="audio-player"></audio>
+            `<audio controls preload="none" src="${result.original}" class="audio-player"></audio>
              <div id="originalWaveform" class="waveform"></div>
              <div id="originalSpectrogram" class="spectrogram"></div>` : 
             '<p>No audio available</p>';
-        if (result.original) initializeWaveform('originalWaveform', result.original);
+        if (result.original) initializeWaveform('originalWaveform', result.original, peaks.original);
     }
     if (previews[1]) {
         previews[1].innerHTML = result.preprocessed ? 
-            `<audio controls src="${result.preprocessed}" class="audio-player"></audio>
+            `<audio controls preload="none" src="${result.preprocessed}" class="audio-player"></audio>
              <div id="preprocessedWaveform" class="waveform"></div>
              <div id="preprocessedSpectrogram" class="spectrogram"></div>` : 
             '<p>No preprocessed audio available</p>';
-        if (result.preprocessed) initializeWaveform('preprocessedWaveform', result.preprocessed);
+        if (result.preprocessed) initializeWaveform('preprocessedWaveform', result.preprocessed, peaks.preprocessed);
     }
     if (previews[2]) {
         previews[2].innerHTML = result.augmented ? 
-            `<audio controls src="${result.augmented}" class="audio-player"></audio>
+            `<audio controls preload="none" src="${result.augmented}" class="audio-player"></audio>
              <div id="augmentedWaveform" class="waveform"></div>
              <div id="augmentedSpectrogram" class="spectrogram"></div>` : 
             '<p>No augmented audio available</p>';
-        if (result.augmented) initializeWaveform('augmentedWaveform', result.augmented);
+        if (result.augmented) initializeWaveform('augmentedWaveform', result.augmented, peaks.augmented);
     }
 }
 
@@ -178,11 +208,13 @@ function update3DPreviews(result) {
         }
     });
 
+    const lods = result.previews || {};
+
     // Update original viewer
     if (viewers.original) {
         if (result.original) {
             viewers.original.innerHTML = '';
-            initializeModelViewer('originalModelViewer', result.original);
+            initializeModelViewer('originalModelViewer', result.original, lods.original);
         } else {
             viewers.original.innerHTML = '<p>No 3D model available</p>';
         }
@@ -192,7 +224,7 @@ function update3DPreviews(result) {
     if (viewers.preprocessed) {
         if (result.preprocessed) {
             viewers.preprocessed.innerHTML = '';
-            initializeModelViewer('preprocessedModelViewer', result.preprocessed);
+            initializeModelViewer('preprocessedModelViewer', result.preprocessed, lods.preprocessed);
         } else {
             viewers.preprocessed.innerHTML = '<p>No preprocessed model available</p>';
         }
@@ -202,15 +234,32 @@ function update3DPreviews(result) {
     if (viewers.augmented) {
         if (result.augmented) {
             viewers.augmented.innerHTML = '';
-            initializeModelViewer('augmentedModelViewer', result.augmented);
+            initializeModelViewer('augmentedModelViewer', result.augmented, lods.augmented);
         } else {
             viewers.augmented.innerHTML = '<p>No augmented model available</p>';
         }
     }
 }
 
+// Build a Three.js mesh from the finest level of a server-side LOD preview
+function buildLodMesh(preview) {
+    const level = preview.levels[preview.levels.length - 1];
+    const [low, high] = preview.bbox;
+    const positions = new Float32Array(level.positions.length);
+    for (let i = 0; i < positions.length; i++) {
+        const axis = i % 3;
+        positions[i] = low[axis] + (level.positions[i] / 65535) * (high[axis] - low[axis]);
+    }
+
+    const geometry = new THREE.BufferGeometry();
+    geometry.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+    geometry.setIndex(level.indices);
+    geometry.computeVertexNormals();
+    return new THREE.Mesh(geometry, new THREE.MeshPhongMaterial({ color: 0xb0b0b0, side: THREE.DoubleSide }));
+}
+
 // 3D Model Viewer
-function initializeModelViewer(containerId, modelUrl) {
+function initializeModelViewer(containerId, modelUrl, previewUrl) {
     const container = document.getElementById(containerId);
     if (!container) return;
 
@@ -256,42 +305,57 @@ function initializeModelViewer(containerId, modelUrl) {
     controls.maxDistance = 10;
     controls.maxPolarAngle = Math.PI;
 
-    // Load model
-    const loader = new THREE.OBJLoader();
-    loader.load(
-        modelUrl,
-        function(object) {
-            // Remove loading indicator
-            container.innerHTML = '';
-            container.appendChild(renderer.domElement);
-
-            // Center and scale model
-            const box = new THREE.Box3().setFromObject(object);
-            const center = box.getCenter(new THREE.Vector3());
-            const size = box.getSize(new THREE.Vector3());
-
-            object.position.sub(center);
-            const maxDim = Math.max(size.x, size.y, size.z);
-            const scale = 2 / maxDim;
-            object.scale.multiplyScalar(scale);
-
-            scene.add(object);
-
-            // Position camera to view the entire model
-            const distance = maxDim * 2;
-            camera.position.set(distance, distance, distance);
-            camera.lookAt(0, 0, 0);
-            controls.update();
-        },
-        function(xhr) {
-            // Progress updates if needed
-            console.log((xhr.loaded / xhr.total * 100) + '% loaded');
-        },
-        function(error) {
-            console.error('Error loading model:', error);
-            container.innerHTML = '<p>Error loading 3D model</p>';
-        }
-    );
+    function showObject(object) {
+        // Remove loading indicator
+        container.innerHTML = '';
+        container.appendChild(renderer.domElement);
+
+        // Center and scale model
+        const box = new THREE.Box3().setFromObject(object);
+        const center = box.getCenter(new THREE.Vector3());
+        const size = box.getSize(new THREE.Vector3());
+
+        object.position.sub(center);
+        const maxDim = Math.max(size.x, size.y, size.z);
+        const scale = 2 / maxDim;
+        object.scale.multiplyScalar(scale);
+
+        scene.add(object);
+
+        // Position camera to view the entire model
+        const distance = maxDim * 2;
+        camera.position.set(distance, distance, distance);
+        camera.lookAt(0, 0, 0);
+        controls.update();
+    }
+
+    function showError(error) {
+        console.error('Error loading model:', error);
+        container.innerHTML = '<p>Error loading 3D model</p>';
+    }
+
+    function loadFullModel() {
+        const loader = new THREE.OBJLoader();
+        loader.load(
+            modelUrl,
+            showObject,
+            function(xhr) {
+                // Progress updates if needed
+                console.log((xhr.loaded / xhr.total * 100) + '% loaded');
+            },
+            showError
+        );
+    }
+
+    // Load the decimated preview when there is one, the full OBJ otherwise
+    if (previewUrl) {
+        fetch(previewUrl)
+            .then(response => response.json())
+            .then(preview => preview.levels.length ? showObject(buildLodMesh(preview)) : loadFullModel())
+            .catch(loadFullModel);
+    } else {
+        loadFullModel();
+    }
 
     // Handle window resize
     function onWindowResize() {
@@ -327,11 +391,11 @@ function initializeModelViewer(containerId, modelUrl) {
 }
 
 // Audio Waveform
-function initializeWaveform(elementId, audioPath) {
+function initializeWaveform(elementId, audioPath, peaksUrl) {
     const container = document.getElementById(elementId);
     if (!container) return;
 
-    const wavesurfer = WaveSurfer.create({
+    const options = {
         container: container,
         waveColor: '#4a9eff',
         progressColor: '#1e88e5',
@@ -341,9 +405,28 @@ function initializeWaveform(elementId, audioPath) {
         cursorWidth: 1,
         height: 100,
         barGap: 3
-    });
+    };
 
-    wavesurfer.load(audioPath);
+    if (!peaksUrl) {
+        WaveSurfer.create(options).load(audioPath);
+        return;
+    }
+
+    // Draw precomputed peaks; the audio itself is only fetched on playback
+    fetch(peaksUrl)
+        .then(response => response.json())
+        .then(preview => {
+            // Use the coarsest level that still has a peak per pixel
+            const levels = preview.levels;
+            let level = levels[0];
+            for (const candidate of levels) {
+                if (candidate.peaks.length / 2 >= container.clientWidth) level = candidate;
+            }
+            const peaks = level.peaks.map(value => value / 127);
+            const wavesurfer = WaveSurfer.create({ ...options, backend: 'MediaElement' });
+            wavesurfer.load(audioPath, peaks, 'none', preview.duration);
+        })
+        .catch(() => WaveSurfer.create(options).load(audioPath));
 }
 
 // Event Listeners
@@ -0,0 +1,7 @@
+"""
+Benchmark suite for the Data Processing Application.
+Measures the processors and HTTP endpoints against synthetic data so that
+performance changes can be compared against a saved baseline.
+
+Run with ``python -m benchmarks --help``.
+"""
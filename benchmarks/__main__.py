@@ -0,0 +1,109 @@
+"""
+Command line entry point for the benchmark suite.
+
+Examples:
+    python -m benchmarks --quick --output bench.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+from .cases import processor_cases, endpoint_cases
+from .harness import measure
+
+
+MIN_MEMORY_REGRESSION = 1 << 20
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Return a description of every case that regressed against the baseline.
+
+    A case regresses when its p50 latency or peak memory grew by more than
+    ``threshold`` (a fraction, e.g. 0.1 for 10%). Memory growth below
+    ``MIN_MEMORY_REGRESSION`` bytes is ignored as allocator and page noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or 'error' in base or 'error' in result:
+            continue
+        for metric in ('p50_ms', 'peak_rss_bytes', 'peak_python_bytes'):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if metric != 'p50_ms' and new - old < MIN_MEMORY_REGRESSION:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(f'{name}: {metric} {old:.4g} -> {new:.4g} (+{change:.0%})')
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='only the smallest input of each kind')
+    parser.add_argument('--exhaustive', action='store_true', help='every subset of processing options')
+    parser.add_argument('--variants', type=int, default=1,
+                        help='also time producing this many augmented copies per call')
+    parser.add_argument('--no-endpoints', action='store_true', help='skip the HTTP endpoint cases')
+    parser.add_argument('--filter', default=None, help='regular expression selecting case names')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', default=None, help='write results as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this results file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed relative regression against the baseline (default 0.10)')
+    args = parser.parse_args(argv)
+
+    cases = processor_cases(quick=args.quick, exhaustive=args.exhaustive, variants=args.variants)
+    if not args.no_endpoints:
+        cases += endpoint_cases()
+    if args.filter:
+        pattern = re.compile(args.filter)
+        cases = [case for case in cases if pattern.search(case.name)]
+
+    results = {}
+    for case in cases:
+        result = measure(case.fn, repeats=args.repeats, warmup=args.warmup, items=case.items)
+        results[case.name] = {**result, 'params': case.params}
+        if 'error' in result:
+            print(f'{case.name:<60} ERROR {result["error"]}')
+        else:
+            print(f'{case.name:<60} p50 {result["p50_ms"]:9.2f} ms  p99 {result["p99_ms"]:9.2f} ms  '
+                  f'{result["throughput_per_s"]:9.2f}/s  peak rss {result["peak_rss_bytes"] / 2**20:8.2f} MiB  '
+                  f'python {result["peak_python_bytes"] / 2**20:8.2f} MiB')
+
+    if args.output:
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) above {args.threshold:.0%}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'\nNo regressions above {args.threshold:.0%} against {args.baseline}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
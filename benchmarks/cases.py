@@ -0,0 +1,197 @@
+"""
+Benchmark case definitions.
+Each case is a named zero-argument callable plus its parameters; names are
+stable so that results can be matched against a saved baseline.
+"""
+
+import atexit
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from app.services import TextProcessor, ImageProcessor, AudioProcessor, ThreeDProcessor
+
+from . import synthetic
+
+# Option keys understood by each processor
+PROCESSOR_OPTIONS = {
+    'text': (
+        ['cleaning', 'lowercase', 'stopwords', 'stemming', 'lemmatization', 'tokenization'],
+        ['synonym', 'insertion'],
+    ),
+    'image': (['resize', 'normalize'], ['flip', 'jitter']),
+    'audio': (['resample'], ['noise', 'stretch', 'pitch']),
+    '3d': (['normalize', 'center'], ['scale', 'noise']),
+}
+
+
+@dataclass
+class Case:
+    """A single benchmark case."""
+    name: str
+    fn: Callable[[], Any]
+    items: int = 1
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def option_sets(file_type: str, exhaustive: bool = False) -> Iterator[Tuple[str, Dict[str, bool], Dict[str, bool]]]:
+    """Yield (label, preprocessing, augmentation) option combinations.
+
+    By default this yields no options, every option on its own and all options
+    together. With ``exhaustive`` every subset of the options is yielded.
+    """
+    pre_keys, aug_keys = PROCESSOR_OPTIONS[file_type]
+    keys = [('pre', k) for k in pre_keys] + [('aug', k) for k in aug_keys]
+
+    if exhaustive:
+        subsets = [c for r in range(len(keys) + 1) for c in combinations(keys, r)]
+    else:
+        subsets = [()] + [(k,) for k in keys] + [tuple(keys)]
+
+    seen = set()
+    for subset in subsets:
+        if subset in seen:
+            continue
+        seen.add(subset)
+        preprocessing = {k: True for kind, k in subset if kind == 'pre'}
+        augmentation = {k: True for kind, k in subset if kind == 'aug'}
+        if not subset:
+            label = 'none'
+        elif len(subset) == len(keys):
+            label = 'all'
+        else:
+            label = '+'.join(k for _, k in subset)
+        yield label, preprocessing, augmentation
+
+
+def with_variants(sets: Iterator[Tuple[str, Dict[str, bool], Dict[str, bool]]],
+                  variants: int) -> Iterator[Tuple[str, Dict[str, bool], Dict[str, bool], int]]:
+    """Add a variant count to each option set, plus a multi-variant run of the 'all' set."""
+    for label, pre, aug in sets:
+        yield label, pre, aug, 1
+        if label == 'all' and variants > 1:
+            yield f'all/x{variants}', pre, aug, variants
+
+
+def processor_cases(quick: bool = False, exhaustive: bool = False, variants: int = 1) -> List[Case]:
+    """Build benchmark cases for every processor and option combination.
+
+    With ``variants`` > 1, each input also gets an ``all/x<variants>`` case that
+    produces that many augmented copies from one call; its throughput counts
+    copies, so it compares directly with the ``all`` case.
+    """
+    text_sizes = synthetic.TEXT_SIZES[:1] if quick else synthetic.TEXT_SIZES
+    corpus_sizes = synthetic.CORPUS_SIZES[:1] if quick else synthetic.CORPUS_SIZES
+    resolutions = synthetic.IMAGE_RESOLUTIONS[:1] if quick else synthetic.IMAGE_RESOLUTIONS
+    durations = synthetic.AUDIO_DURATIONS[:1] if quick else synthetic.AUDIO_DURATIONS
+    sample_rates = synthetic.AUDIO_SAMPLE_RATES[:1] if quick else synthetic.AUDIO_SAMPLE_RATES
+    subdivisions = synthetic.MESH_SUBDIVISIONS[:1] if quick else synthetic.MESH_SUBDIVISIONS
+
+    cases = []
+
+    for n_words in text_sizes:
+        text = synthetic.make_text(n_words)
+        for label, pre, aug, k in with_variants(option_sets('text', exhaustive), variants):
+            cases.append(Case(
+                name=f'text/{n_words}w/{label}',
+                fn=lambda text=text, pre=pre, aug=aug, k=k: TextProcessor.process(text, pre, aug, variants=k),
+                items=k,
+                params={'words': n_words, 'preprocessing': pre, 'augmentation': aug, 'variants': k},
+            ))
+
+    # A corpus of independent documents per call; throughput counts documents
+    for n_docs, n_words in corpus_sizes:
+        corpus = synthetic.make_text_corpus(n_docs, n_words)
+        for label, pre, aug, k in with_variants(option_sets('text', exhaustive), variants):
+            cases.append(Case(
+                name=f'text/corpus{n_docs}x{n_words}w/{label}',
+                fn=lambda corpus=corpus, pre=pre, aug=aug, k=k: [TextProcessor.process(text, pre, aug, variants=k)
+                                                                 for text in corpus],
+                items=n_docs * k,
+                params={'documents': n_docs, 'words': n_words, 'preprocessing': pre, 'augmentation': aug,
+                        'variants': k},
+            ))
+
+    for width, height in resolutions:
+        image = synthetic.make_image((width, height))
+        for label, pre, aug, k in with_variants(option_sets('image', exhaustive), variants):
+            cases.append(Case(
+                name=f'image/{width}x{height}/{label}',
+                fn=lambda image=image, pre=pre, aug=aug, k=k: ImageProcessor.process(image, pre, aug, variants=k),
+                items=k,
+                params={'width': width, 'height': height, 'preprocessing': pre, 'augmentation': aug,
+                        'variants': k},
+            ))
+
+    for duration in durations:
+        for sr in sample_rates:
+            audio, _ = synthetic.make_audio(duration, sr)
+            for label, pre, aug, k in with_variants(option_sets('audio', exhaustive), variants):
+                cases.append(Case(
+                    name=f'audio/{duration:g}s@{sr}/{label}',
+                    fn=lambda audio=audio, sr=sr, pre=pre, aug=aug, k=k: AudioProcessor.process(
+                        audio, sr, pre, aug, variants=k),
+                    items=k,
+                    params={'duration_s': duration, 'sample_rate': sr, 'preprocessing': pre,
+                            'augmentation': aug, 'variants': k},
+                ))
+
+    for level in subdivisions:
+        mesh = synthetic.make_mesh(level)
+        n_vertices = len(mesh.vertices)
+        for label, pre, aug, k in with_variants(option_sets('3d', exhaustive), variants):
+            cases.append(Case(
+                name=f'3d/{n_vertices}v/{label}',
+                fn=lambda mesh=mesh, pre=pre, aug=aug, k=k: ThreeDProcessor.process(mesh, pre, aug, variants=k),
+                items=k,
+                params={'vertices': n_vertices, 'preprocessing': pre, 'augmentation': aug, 'variants': k},
+            ))
+
+    return cases
+
+
+def endpoint_cases() -> List[Case]:
+    """Build benchmark cases for the HTTP endpoints using an in-process client."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # Entering the client runs the app's startup, which renders the home page
+    client = TestClient(app).__enter__()
+    atexit.register(client.__exit__, None, None, None)
+
+    uploads = [
+        ('text', 'bench.txt', synthetic.encode_text(synthetic.make_text(synthetic.TEXT_SIZES[0]))),
+        ('image', 'bench.png', synthetic.encode_image(synthetic.make_image(synthetic.IMAGE_RESOLUTIONS[0]))),
+        ('audio', 'bench.wav', synthetic.encode_audio(synthetic.make_audio(synthetic.AUDIO_DURATIONS[0], synthetic.AUDIO_SAMPLE_RATES[0]))),
+        ('3d', 'bench.obj', synthetic.encode_mesh(synthetic.make_mesh(synthetic.MESH_SUBDIVISIONS[0]))),
+    ]
+
+    def post(url: str, **kwargs) -> None:
+        response = client.post(url, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.text[:200]}')
+
+    cases = [Case(name='endpoint/home', fn=lambda: client.get('/').raise_for_status())]
+
+    for file_type, filename, payload in uploads:
+        _, pre, aug = list(option_sets(file_type))[-1]
+
+        def upload(filename=filename, payload=payload) -> None:
+            post('/upload', files={'file': (filename, payload)})
+
+        def upload_and_preprocess(upload=upload, pre=pre, aug=aug) -> None:
+            upload()
+            post('/preprocess', json={'preprocessing': pre, 'augmentation': aug})
+
+        cases.append(Case(
+            name=f'endpoint/upload/{file_type}',
+            fn=upload,
+            params={'bytes': len(payload)},
+        ))
+        cases.append(Case(
+            name=f'endpoint/upload+preprocess/{file_type}',
+            fn=upload_and_preprocess,
+            params={'bytes': len(payload), 'preprocessing': pre, 'augmentation': aug},
+        ))
+
+    return cases
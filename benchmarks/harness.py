@@ -0,0 +1,129 @@
+"""
+Measurement helpers for the benchmark suite.
+Times a callable repeatedly and reports latency percentiles, throughput and
+peak memory: resident memory, which includes native allocations made by
+PIL, libsndfile and NumPy, and Python allocations traced by tracemalloc.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List
+
+import numpy as np
+
+
+def percentiles(samples: Iterable[float]) -> Dict[str, float]:
+    """Return p50/p95/p99 and mean of the samples in milliseconds."""
+    values = np.asarray(list(samples), dtype=np.float64) * 1000.0
+    if values.size == 0:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0}
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(values.mean()),
+    }
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+        return libc if hasattr(libc, 'malloc_trim') else None
+    except OSError:
+        return None
+
+
+# glibc only: returns freed heap memory to the OS
+_libc = _load_libc()
+
+
+def _status_bytes(field: str) -> int:
+    """Read a memory field (e.g. VmRSS, VmHWM) of this process from /proc, in bytes."""
+    with open('/proc/self/status', 'r') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+    raise OSError(f'{field} not found in /proc/self/status')
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def peak_rss_growth(fn: Callable[[], Any]) -> int:
+    """Call ``fn`` and return how far the resident set size peaked above its size before the call.
+
+    On Linux the high-water mark is reset first (/proc/self/clear_refs), so
+    every call is measured. Elsewhere only the process-wide peak is
+    available, and a call that stays below an earlier peak reports 0.
+    Freed memory is first returned to the OS where the allocator supports
+    it, so memory kept by earlier calls is counted again when reused.
+    """
+    gc.collect()
+    if _libc is not None:
+        _libc.malloc_trim(0)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        before = _status_bytes('VmRSS')
+    except OSError:
+        before = _max_rss_bytes()
+        fn()
+        return max(0, _max_rss_bytes() - before)
+    fn()
+    return max(0, _status_bytes('VmHWM') - before)
+
+
+def measure(fn: Callable[[], Any], repeats: int = 5, warmup: int = 1,
+            items: int = 1) -> Dict[str, Any]:
+    """Benchmark ``fn``.
+
+    Args:
+        fn: Zero-argument callable performing one unit of work
+        repeats: Number of timed calls
+        warmup: Number of untimed calls made first
+        items: Number of items processed by one call, used for throughput
+
+    Returns:
+        Dictionary with latency percentiles, throughput (items per second),
+        the peak growth of resident memory in bytes and the peak of traced
+        Python allocations in bytes. If ``fn`` raises, the dictionary
+        contains the error instead.
+    """
+    try:
+        for _ in range(warmup):
+            fn()
+
+        samples: List[float] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+
+        # Memory is measured on separate calls so tracing overhead does not
+        # distort the timings.
+        peak_rss = peak_rss_growth(fn)
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+
+    total = sum(samples)
+    return {
+        **percentiles(samples),
+        'throughput_per_s': (items * repeats / total) if total > 0 else 0.0,
+        'peak_rss_bytes': int(peak_rss),
+        'peak_python_bytes': int(peak),
+        'repeats': repeats,
+    }
@@ -0,0 +1,265 @@
+"""
+HTTP load-testing harness.
+Replays a weighted mix of upload/preprocess traffic from many concurrent
+async clients against the app, either in-process (ASGI transport), against
+a uvicorn server started for the run, or against an already running URL.
+
+Examples:
+    python -m benchmarks.loadtest --clients 16 --duration 30
+    python -m benchmarks.loadtest --spawn --mix image=3,audio=1 --size large
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from . import synthetic
+from .cases import PROCESSOR_OPTIONS, option_sets
+from .harness import percentiles
+
+SIZES = {'small': 0, 'medium': 1, 'large': 2}
+
+
+@dataclass
+class Sample:
+    """Outcome of one HTTP request."""
+    endpoint: str
+    start: float
+    latency: float
+    ok: bool
+    status: int
+
+
+def make_payloads(size: str) -> Dict[str, Tuple[str, bytes]]:
+    """Encode one synthetic upload per modality at the requested size."""
+    i = SIZES[size]
+    return {
+        'text': ('load.txt', synthetic.encode_text(synthetic.make_text(synthetic.TEXT_SIZES[i]))),
+        'image': ('load.png', synthetic.encode_image(synthetic.make_image(synthetic.IMAGE_RESOLUTIONS[i]))),
+        'audio': ('load.wav', synthetic.encode_audio(
+            synthetic.make_audio(synthetic.AUDIO_DURATIONS[i], synthetic.AUDIO_SAMPLE_RATES[-1]))),
+        '3d': ('load.obj', synthetic.encode_mesh(synthetic.make_mesh(synthetic.MESH_SUBDIVISIONS[i]))),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a traffic mix such as ``text=1,image=2`` into weights."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name not in PROCESSOR_OPTIONS:
+            raise ValueError(f'Unknown modality in mix: {name}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """Return the resident set size of ``pid`` (default: this process)."""
+    try:
+        with open(f'/proc/{pid or "self"}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid is None:
+        # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+    return 0
+
+
+class LoadTest:
+    """Drives concurrent clients and collects samples."""
+
+    def __init__(self, client: httpx.AsyncClient, payloads: Dict[str, Tuple[str, bytes]],
+                 mix: Dict[str, float], server_pid: Optional[int] = None, seed: int = 0):
+        self.client = client
+        self.payloads = payloads
+        self.mix = mix
+        self.server_pid = server_pid
+        self.random = random.Random(seed)
+        self.samples: List[Sample] = []
+        self.rss: List[Tuple[float, int]] = []
+        self.t0 = 0.0
+        self.elapsed = 0.0
+        self.scenarios: Dict[str, Callable[[], Any]] = {
+            name: self._upload_and_preprocess(name) for name in mix
+        }
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Send a request, record its sample and return the JSON body if it succeeded."""
+        start = time.perf_counter()
+        body = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+            if status == 200 and response.json().get('status') == 'success':
+                body = response.json()
+        except Exception:
+            status = 0
+        self.samples.append(Sample(endpoint, start - self.t0, time.perf_counter() - start, body is not None, status))
+        return body
+
+    def _upload_and_preprocess(self, file_type: str) -> Callable[[], Any]:
+        filename, payload = self.payloads[file_type]
+        _, preprocessing, augmentation = list(option_sets(file_type))[-1]
+
+        async def scenario() -> None:
+            upload = await self._request(f'upload/{file_type}', 'POST', '/upload',
+                                         files={'file': (filename, payload)})
+            if upload:
+                await self._request(f'preprocess/{file_type}', 'POST', '/preprocess',
+                                    json={'preprocessing': preprocessing, 'augmentation': augmentation,
+                                          'file_id': upload['file_id']})
+
+        return scenario
+
+    async def _client_loop(self, deadline: float, remaining: List[int]) -> None:
+        names, weights = list(self.scenarios), list(self.mix.values())
+        while time.perf_counter() < deadline and remaining[0] != 0:
+            remaining[0] -= 1
+            name = self.random.choices(names, weights)[0]
+            await self.scenarios[name]()
+
+    async def _sample_rss(self, interval: float) -> None:
+        while True:
+            self.rss.append((time.perf_counter() - self.t0, rss_bytes(self.server_pid)))
+            await asyncio.sleep(interval)
+
+    async def run(self, clients: int, duration: float, iterations: int = -1,
+                  rss_interval: float = 0.5) -> None:
+        self.t0 = time.perf_counter()
+        deadline = self.t0 + duration
+        remaining = [iterations]
+        sampler = asyncio.create_task(self._sample_rss(rss_interval))
+        try:
+            await asyncio.gather(*(self._client_loop(deadline, remaining) for _ in range(clients)))
+        finally:
+            sampler.cancel()
+        self.elapsed = time.perf_counter() - self.t0
+
+    def report(self) -> Dict[str, Any]:
+        endpoints = {}
+        for name in sorted({s.endpoint for s in self.samples}):
+            samples = [s for s in self.samples if s.endpoint == name]
+            errors = sum(1 for s in samples if not s.ok)
+            endpoints[name] = {
+                'requests': len(samples),
+                'throughput_per_s': len(samples) / self.elapsed if self.elapsed else 0.0,
+                'error_rate': errors / len(samples),
+                **percentiles(s.latency for s in samples),
+            }
+        total_errors = sum(1 for s in self.samples if not s.ok)
+        return {
+            'elapsed_s': self.elapsed,
+            'requests': len(self.samples),
+            'throughput_per_s': len(self.samples) / self.elapsed if self.elapsed else 0.0,
+            'error_rate': total_errors / len(self.samples) if self.samples else 0.0,
+            **percentiles(s.latency for s in self.samples),
+            'endpoints': endpoints,
+            'rss_bytes': [{'t_s': t, 'rss': rss} for t, rss in self.rss],
+            'peak_rss_bytes': max((rss for _, rss in self.rss), default=0),
+        }
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """Start a local uvicorn server and wait until it answers."""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('uvicorn exited during startup')
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/docs', timeout=1.0)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('uvicorn did not start within 30 seconds')
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f'{"endpoint":<24} {"reqs":>6} {"req/s":>8} {"err%":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    rows = list(report['endpoints'].items()) + [('TOTAL', report)]
+    for name, row in rows:
+        print(f'{name:<24} {row["requests"]:>6} {row["throughput_per_s"]:>8.2f} {row["error_rate"] * 100:>6.1f} '
+              f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f}')
+    print(f'peak server RSS: {report["peak_rss_bytes"] / 2**20:.1f} MiB')
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    payloads = make_payloads(args.size)
+    mix = parse_mix(args.mix)
+    server = None
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout)
+        server_pid = args.server_pid
+    elif args.spawn:
+        server = spawn_server(args.port)
+        client = httpx.AsyncClient(base_url=f'http://127.0.0.1:{args.port}', timeout=timeout)
+        server_pid = server.pid
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                   base_url='http://testserver', timeout=timeout)
+        server_pid = None
+
+    try:
+        async with client:
+            test = LoadTest(client, payloads, mix, server_pid=server_pid, seed=args.seed)
+            await test.run(args.clients, args.duration, args.iterations)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = test.report()
+    report['config'] = vars(args)
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default=None, help='load an already running server')
+    target.add_argument('--spawn', action='store_true', help='start a local uvicorn server for the run')
+    parser.add_argument('--port', type=int, default=8765, help='port used with --spawn')
+    parser.add_argument('--server-pid', type=int, default=None, help='pid to sample RSS from with --url')
+    parser.add_argument('--clients', type=int, default=8, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='run time in seconds')
+    parser.add_argument('--iterations', type=int, default=-1, help='stop after this many scenarios')
+    parser.add_argument('--mix', default='text=1,image=1,audio=1,3d=1', help='weighted traffic mix')
+    parser.add_argument('--size', choices=list(SIZES), default='small', help='upload size')
+    parser.add_argument('--timeout', type=float, default=120.0, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='write the report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
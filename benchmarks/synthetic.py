@@ -0,0 +1,89 @@
+"""
+Synthetic data generators for the benchmark suite.
+Every generator is seeded so that repeated runs measure identical inputs.
+"""
+
+import io
+from typing import List, Tuple
+
+import numpy as np
+import soundfile as sf
+import trimesh
+from PIL import Image
+
+# Small vocabulary with common English words so that stop word removal,
+# stemming and WordNet lookups all have real work to do.
+VOCABULARY = [
+    'the', 'a', 'of', 'and', 'to', 'in', 'is', 'was', 'for', 'on', 'with',
+    'running', 'jumped', 'quickly', 'houses', 'cities', 'better', 'happily',
+    'data', 'process', 'model', 'image', 'sound', 'signal', 'network',
+    'computer', 'learning', 'training', 'testing', 'values', 'studies',
+    'beautiful', 'small', 'large', 'green', 'river', 'mountain', 'walked',
+]
+
+TEXT_SIZES = [100, 1_000, 10_000]
+CORPUS_SIZES = [(50, 100), (200, 500)]  # (documents, words per document)
+IMAGE_RESOLUTIONS = [(256, 256), (1024, 768), (1920, 1080)]
+AUDIO_DURATIONS = [1.0, 5.0, 30.0]
+AUDIO_SAMPLE_RATES = [16_000, 44_100]
+MESH_SUBDIVISIONS = [2, 4, 6]
+
+
+def make_text(n_words: int, seed: int = 0) -> str:
+    """Generate a random text document with roughly ``n_words`` words."""
+    rng = np.random.default_rng(seed)
+    words = rng.choice(VOCABULARY, size=n_words)
+    sentences = []
+    for start in range(0, n_words, 12):
+        sentence = ' '.join(words[start:start + 12])
+        sentences.append(sentence.capitalize() + '.')
+    return '\n'.join(sentences)
+
+
+def make_text_corpus(n_docs: int, n_words: int, seed: int = 0) -> List[str]:
+    """Generate ``n_docs`` independent random documents."""
+    return [make_text(n_words, seed + i) for i in range(n_docs)]
+
+
+def make_image(resolution: Tuple[int, int], seed: int = 0) -> Image.Image:
+    """Generate an RGB noise image of the given (width, height)."""
+    rng = np.random.default_rng(seed)
+    width, height = resolution
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def make_audio(duration: float, sr: int, seed: int = 0) -> Tuple[np.ndarray, int]:
+    """Generate a mono test signal (tone plus noise) of ``duration`` seconds."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sr)) / sr
+    signal = 0.5 * np.sin(2 * np.pi * 440.0 * t) + 0.05 * rng.standard_normal(t.shape)
+    return signal.astype(np.float64), sr
+
+
+def make_mesh(subdivisions: int, seed: int = 0) -> trimesh.Trimesh:
+    """Generate a perturbed icosphere; vertex count grows 4x per subdivision."""
+    rng = np.random.default_rng(seed)
+    mesh = trimesh.creation.icosphere(subdivisions=subdivisions)
+    mesh.vertices = mesh.vertices * (1.0 + 0.05 * rng.standard_normal((len(mesh.vertices), 1)))
+    return mesh
+
+
+def encode_text(text: str) -> bytes:
+    return text.encode('utf-8')
+
+
+def encode_image(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def encode_audio(audio: Tuple[np.ndarray, int]) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio[0], audio[1], format='WAV')
+    return buffer.getvalue()
+
+
+def encode_mesh(mesh: trimesh.Trimesh) -> bytes:
+    return mesh.export(file_type='obj').encode('utf-8')
@@ -0,0 +1,46 @@
+import json
+import tarfile
+
+from app.services.export import MANIFEST_FILENAME, ShardReader, ShardWriter
+
+
+def test_shards_round_trip(tmp_path):
+    records = {
+        'empty.txt': b'',
+        'one_block.bin': b'a' * 512,
+        'odd_size.bin': bytes(range(256)) * 3 + b'x',
+        # Longer than the 100 characters of a ustar name: needs PAX headers
+        f'{"nested/" * 20}long_name.png': b'\x89PNG' * 300,
+    }
+    records.update({f'{i:06d}/original.txt': f'record {i}'.encode() * (i + 1) for i in range(20)})
+
+    writer = ShardWriter(tmp_path, max_shard_bytes=4096)
+    for key, data in records.items():
+        writer.add(key, data)
+    shards = writer.close()
+    with open(tmp_path / MANIFEST_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump({'shards': shards}, f)
+
+    assert len(shards) > 1
+    assert sum(shard['records'] for shard in shards) == len(records)
+
+    extracted = {}
+    for shard in shards:
+        with open(tmp_path / shard['index'], 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        with tarfile.open(tmp_path / shard['tar']) as tar:
+            members = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+        assert set(index) == set(members)
+        with open(tmp_path / shard['tar'], 'rb') as f:
+            for key, (offset, size) in index.items():
+                f.seek(offset)
+                assert f.read(size) == members[key]
+        extracted.update(members)
+    assert extracted == records
+
+    reader = ShardReader(tmp_path)
+    assert sorted(reader.keys()) == sorted(records)
+    for key, data in records.items():
+        assert key in reader
+        assert reader.read(key) == data
+    assert 'missing' not in reader
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+
+from app.services.near_duplicates import find_near_duplicates, minhash, shingles
+
+
+def _document(rng: random.Random, words: int = 150) -> str:
+    vocabulary = [''.join(rng.choice('abcdefghijklmnop') for _ in range(6)) for _ in range(1000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+def test_signatures_estimate_jaccard_similarity():
+    rng = random.Random(0)
+    text = _document(rng)
+    assert np.array_equal(minhash(shingles(text)), minhash(shingles(text)))
+    assert np.array_equal(shingles(text.upper()), shingles(f'  {text}\n'))
+    assert np.mean(minhash(shingles(text)) == minhash(shingles(_document(rng)))) < 0.2
+
+
+def test_clusters_exact_reformatted_and_unrelated_texts():
+    rng = random.Random(1)
+    first, second, unrelated = _document(rng), _document(rng), _document(rng)
+    edited = first.split()
+    edited[len(edited) // 2] = 'changed'
+    texts = [
+        first,
+        second,
+        first,                                 # exact copy
+        '\n\n'.join(first.upper().split(' ')),  # reformatted: case and whitespace
+        ' '.join(edited),                      # one word changed
+        unrelated,
+        None,                                  # skipped
+        second,
+    ]
+
+    duplicates = find_near_duplicates(texts)
+
+    assert {index: representative for index, (representative, _) in duplicates.items()} == {
+        2: 0, 3: 0, 4: 0, 7: 1}
+    assert duplicates[2][1] == duplicates[3][1] == 1.0
+    assert 0.8 <= duplicates[4][1] < 1.0
+
+
+def test_no_duplicates_among_unrelated_texts():
+    rng = random.Random(2)
+    assert find_near_duplicates([_document(rng) for _ in range(50)]) == {}
+    assert find_near_duplicates([]) == {}
+
+
+def test_chains_of_small_edits_do_not_merge_into_one_cluster():
+    rng = random.Random(3)
+    words = _document(rng, words=400).split()
+    chain = []
+    for _ in range(7):
+        chain.append(' '.join(words))
+        words = list(words)
+        for position in rng.sample(range(len(words)), len(words) // 40):
+            words[position] = _document(rng, words=1)
+
+    duplicates = find_near_duplicates(chain)
+
+    signatures = [minhash(shingles(text)) for text in chain]
+    for index, (representative, similarity) in duplicates.items():
+        assert representative < index
+        assert similarity == np.mean(signatures[representative] == signatures[index]) >= 0.8
+    # Text 4 drifted too far from text 0 and starts a cluster of its own
+    assert {index: representative for index, (representative, _) in duplicates.items()} == {
+        1: 0, 2: 0, 3: 0, 5: 4, 6: 4}